@@ -0,0 +1,159 @@
+"""
+Autoscaler del pool de Celery según la latencia de cola.
+
+Celery llama a `_maybe_scale` con cada mensaje y cada AUTOSCALE_KEEPALIVE
+segundos; la decisión se recalcula como mucho cada AUTOSCALE_INTERVAL_SECONDS:
+
+- Mensajes en las colas que consume el worker (el broker, Redis).
+- Duración media de las últimas tareas (worker_metrics.recent_durations,
+  compartida por todos los workers).
+- Workers vivos: cada autoscaler se anota en un sorted set de Redis, y la
+  cola se reparte entre ellos.
+
+El backlog de un worker es su parte de la cola más las tareas que ya
+reservó (en ejecución o esperando un proceso libre). Con N procesos, un
+mensaje nuevo espera aproximadamente backlog * duración / N, así que el
+objetivo es ceil(backlog * duración / AUTOSCALE_TARGET_LATENCY_SECONDS),
+nunca menos que los procesos ocupados, dentro de --autoscale=MAX,MIN.
+Reducir sigue la regla de Celery: solo pasado AUTOSCALE_KEEPALIVE desde el
+último crecimiento.
+
+Celery fija el prefetch en MAX * worker_prefetch_multiplier aunque el pool
+tenga menos procesos: el worker sacaría de Redis tareas que no puede
+ejecutar y una tarea alta esperaría detrás de tareas bajas ya reservadas.
+El autoscaler lo ajusta a procesos * multiplier después de cada cambio.
+
+Cada decisión se registra en el log, en métricas (celery_autoscaler_*) y en
+`celery inspect stats` (clave autoscaler).
+"""
+import math
+import os
+import socket
+import time
+from celery.utils.log import get_logger
+from celery.worker import state
+from celery.worker.autoscale import Autoscaler
+from prometheus_client import Counter, Gauge
+from .worker_metrics import queue_depths, recent_durations
+
+logger = get_logger(__name__)
+
+TARGET_LATENCY = float(os.getenv("AUTOSCALE_TARGET_LATENCY_SECONDS", "10"))
+DECISION_INTERVAL = float(os.getenv("AUTOSCALE_INTERVAL_SECONDS", "5"))
+DEFAULT_TASK_SECONDS = float(os.getenv("AUTOSCALE_DEFAULT_TASK_SECONDS", "3.5"))
+WORKERS_KEY = "celery:autoscaler:workers"
+
+AUTOSCALER_PROCESSES = Gauge(
+    "celery_autoscaler_processes", "Procesos del pool", multiprocess_mode="max"
+)
+AUTOSCALER_DESIRED = Gauge(
+    "celery_autoscaler_desired_processes", "Procesos que pide la última decisión", multiprocess_mode="max"
+)
+AUTOSCALER_LATENCY = Gauge(
+    "celery_autoscaler_estimated_queue_latency_seconds", "Latencia de cola estimada con los procesos actuales",
+    multiprocess_mode="max"
+)
+AUTOSCALER_DECISIONS = Counter(
+    "celery_autoscaler_decisions_total", "Decisiones del autoscaler", ["action"]
+)
+
+
+class QueueLatencyAutoscaler(Autoscaler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.target_latency = TARGET_LATENCY
+        self.interval = DECISION_INTERVAL
+        self.hostname = getattr(self.worker, "hostname", None) or socket.gethostname()
+        self.desired = self.min_concurrency
+        self.last_decision = {}
+        self._decided_at = 0.0
+
+    def _live_workers(self) -> int:
+        """Anota este worker y cuenta los que se anotaron recientemente"""
+        now = time.time()
+        pipe = recent_durations.client.pipeline(transaction=False)
+        pipe.zadd(WORKERS_KEY, {self.hostname: now})
+        pipe.zremrangebyscore(WORKERS_KEY, "-inf", now - 3 * max(self.interval, self.keepalive))
+        pipe.zcard(WORKERS_KEY)
+        return max(1, pipe.execute()[-1])
+
+    def decide(self) -> dict:
+        app = self.worker.app
+        depth = sum(queue_depths(app, app.amqp.queues.consume_from).values())
+        workers = self._live_workers()
+        task_seconds = recent_durations.mean() or DEFAULT_TASK_SECONDS
+        busy = len(state.active_requests)
+        # Incluye las en ejecución: reserved_requests es lo que cuenta Autoscaler.qty
+        reserved = len(state.reserved_requests)
+
+        backlog = depth / workers + reserved
+        needed = math.ceil(backlog * task_seconds / self.target_latency)
+        desired = min(self.max_concurrency, max(self.min_concurrency, needed, busy))
+        return {
+            "queue_depth": depth,
+            "workers": workers,
+            "task_seconds": round(task_seconds, 3),
+            "busy": busy,
+            "reserved": reserved,
+            "estimated_latency": round(backlog * task_seconds / max(1, self.processes), 3),
+            "desired": desired,
+        }
+
+    def _maybe_scale(self, req=None):
+        now = time.monotonic()
+        if now - self._decided_at >= self.interval:
+            self._decided_at = now
+            try:
+                self.last_decision = self.decide()
+                self.desired = self.last_decision["desired"]
+                self._observe()
+            except Exception as e:
+                # Sin datos del broker se mantiene la decisión anterior
+                logger.error("Autoscaler: no se pudo decidir: %r", e)
+
+        procs = self.processes
+        scaled = None
+        if self.desired > procs:
+            self.scale_up(self.desired - procs)
+            scaled = True
+        elif self.desired < procs and self._keepalive_expired():
+            self.scale_down(procs - self.desired)
+            scaled = True
+        self._sync_prefetch()
+        AUTOSCALER_PROCESSES.set(self.processes)
+        return scaled
+
+    def _keepalive_expired(self) -> bool:
+        """La condición de Autoscaler.scale_down: si no se cumple no reduce"""
+        return bool(self._last_scale_up) and time.monotonic() - self._last_scale_up > self.keepalive
+
+    def _sync_prefetch(self):
+        """Prefetch = procesos * multiplier, en lugar del MAX * multiplier de Celery"""
+        consumer = getattr(self.worker, "consumer", None)
+        qos = getattr(consumer, "qos", None)
+        if qos is None or not qos.value:
+            return  # consumidor sin arrancar o prefetch ilimitado
+        target = max(1, self.processes) * consumer.prefetch_multiplier
+        if qos.value != target:
+            consumer.initial_prefetch_count = target
+            if target > qos.value:
+                qos.increment_eventually(target - qos.value)
+            else:
+                qos.decrement_eventually(qos.value - target)
+
+    def _observe(self):
+        decision = self.last_decision
+        procs = self.processes
+        action = "up" if decision["desired"] > procs else "down" if decision["desired"] < procs else "hold"
+        AUTOSCALER_DECISIONS.labels(action).inc()
+        AUTOSCALER_DESIRED.set(decision["desired"])
+        AUTOSCALER_LATENCY.set(decision["estimated_latency"])
+        if action != "hold":
+            logger.info(
+                "Autoscaler: %s de %s a %s procesos (cola %s en %s workers, %.2fs por tarea, latencia estimada %.1fs)",
+                action, procs, decision["desired"], decision["queue_depth"], decision["workers"],
+                decision["task_seconds"], decision["estimated_latency"]
+            )
+
+    def info(self):
+        return {**super().info(), "target_latency": self.target_latency, "last_decision": self.last_decision}
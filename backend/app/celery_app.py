@@ -1,11 +1,26 @@
 from celery import Celery
+from celery.signals import before_task_publish, worker_init
+from kombu import Queue
+from typing import Optional
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+# Colas por prioridad: los workers consumen en este orden (ver broker_transport_options)
+QUEUE_HIGH = "transactions.high"
+QUEUE_DEFAULT = "transactions.default"
+QUEUE_LOW = "transactions.low"
+# Excedente de los usuarios que superan su cuota (ver services/user_fairness.py)
+QUEUE_OVERFLOW = "transactions.overflow"
+PRIORITY_QUEUES = {"high": QUEUE_HIGH, "normal": QUEUE_DEFAULT, "low": QUEUE_LOW}
+
+# Transferencias y montos desde este valor van a la cola alta
+HIGH_VALUE_THRESHOLD = float(os.getenv("TRANSACTION_HIGH_VALUE_THRESHOLD", "10000"))
+
 celery_app = Celery(
     "transactions",
     broker=REDIS_URL,
@@ -21,6 +36,48 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=300,  # 5 minutos
     task_soft_time_limit=240,  # 4 minutos
+    task_queues=(
+        Queue(QUEUE_HIGH),
+        Queue(QUEUE_DEFAULT),
+        Queue(QUEUE_LOW),
+        Queue(QUEUE_OVERFLOW),
+    ),
+    task_default_queue=QUEUE_DEFAULT,
+    # Redis: se vacía primero la cola alta, luego la normal, la baja y el excedente
+    broker_transport_options={"queue_order_strategy": "priority"},
+    # Cada proceso toma una tarea a la vez: una tarea alta que llega no
+    # espera detrás de tareas bajas ya reservadas. Con --autoscale Celery
+    # reserva para MAX procesos; el autoscaler lo baja a los procesos actuales
+    worker_prefetch_multiplier=1,
+    # Con --autoscale, el tamaño del pool sigue la latencia de cola (ver autoscaler.py)
+    worker_autoscaler="app.autoscaler:QueueLatencyAutoscaler",
 )
 
+
+def route_transaction(tipo: str, monto: float, priority: Optional[str] = None) -> str:
+    """Cola de process_transaction según la prioridad explícita o el tipo y monto"""
+    if priority:
+        return PRIORITY_QUEUES[priority]
+    if tipo == "transferencia" or monto >= HIGH_VALUE_THRESHOLD:
+        return QUEUE_HIGH
+    return QUEUE_DEFAULT
+
 celery_app.autodiscover_tasks(['app'], force=True)
+
+
+@before_task_publish.connect
+def _mark_enqueued(headers=None, **kwargs):
+    """Marca de encolado del productor; el worker mide con ella la espera en cola"""
+    if headers is not None:
+        headers["enqueued_at"] = time.time()
+
+
+@worker_init.connect
+def _setup_worker_metrics(sender=None, **kwargs):
+    """
+    La telemetría se carga solo en el worker, en el proceso principal antes de
+    crear el pool (los procesos hijos heredan sus señales). La API no la importa.
+    """
+    from . import worker_metrics
+
+    worker_metrics.start_exporter(sender.app)
@@ -1,10 +1,27 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
+from .database import engine, Base, SessionLocal
+from .metrics import MetricsMiddleware, instrument_engine, render_metrics
 from .routers import transactions, internal, assistant
+from .services.summary_search import setup_search_index
+from .services.text_storage import setup_text_storage
+from .services.idempotency_cache import idempotency_cache
+from .services.notification_relay import NotificationRelay
+from .services.transaction_events import setup_transaction_events
+from .services.transaction_store import setup_idempotency_store, sweep_expired
 
 # Crear las tablas en la base de datos
 Base.metadata.create_all(bind=engine)
+setup_text_storage(engine)
+setup_search_index(engine)
+setup_idempotency_store(engine)
+setup_transaction_events(engine)
+instrument_engine(engine)
+
+# Filtro de Bloom con las claves de idempotencia existentes
+print(f"🔑 Claves de idempotencia cargadas: {idempotency_cache.warm_up(engine)}")
 
 app = FastAPI(
     title="Transaction API",
@@ -21,11 +38,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Métricas por ruta (latencia, en curso, consultas a BD)
+app.add_middleware(MetricsMiddleware)
+
 # Incluir routers
 app.include_router(transactions.router)
 app.include_router(internal.router)
 app.include_router(assistant.router)
 
+# Limpieza periódica de claves de idempotencia expiradas
+IDEMPOTENCY_SWEEP_INTERVAL = int(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL_SECONDS", "60"))
+
+
+def _sweep_idempotency_keys() -> int:
+    db = SessionLocal()
+    try:
+        return sweep_expired(db)
+    finally:
+        db.close()
+
+
+async def _idempotency_sweeper():
+    while True:
+        try:
+            deleted = await asyncio.to_thread(_sweep_idempotency_keys)
+            if deleted:
+                print(f"🧹 Claves de idempotencia expiradas eliminadas: {deleted}")
+        except Exception as e:
+            print(f"Error limpiando claves de idempotencia: {e}")
+        await asyncio.sleep(IDEMPOTENCY_SWEEP_INTERVAL)
+
+
+@app.on_event("startup")
+async def start_idempotency_sweeper():
+    app.state.idempotency_sweeper = asyncio.create_task(_idempotency_sweeper())
+
+
+@app.on_event("shutdown")
+async def stop_idempotency_sweeper():
+    app.state.idempotency_sweeper.cancel()
+
+
+# Publica los cambios de transacciones (outbox) a la caché, long-polls y WebSockets
+notification_relay = NotificationRelay(SessionLocal)
+
+
+@app.on_event("startup")
+async def start_notification_relay():
+    app.state.notification_relay = asyncio.create_task(notification_relay.run())
+
+
+@app.on_event("shutdown")
+async def stop_notification_relay():
+    app.state.notification_relay.cancel()
+
 @app.get("/")
 async def root():
     return {
@@ -37,3 +103,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas en formato Prometheus"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
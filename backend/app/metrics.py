@@ -0,0 +1,187 @@
+"""
+Métricas Prometheus de la API (GET /metrics).
+
+- HTTP: histograma de latencia y contador de peticiones por método y ruta
+  (la plantilla, p. ej. /transactions/{transaction_id}, no la URL concreta)
+  y peticiones en curso.
+- BD: consultas y tiempo de BD por petición, vía eventos del engine.
+- WebSocket: conexiones activas, usuarios conectados y fan-out de broadcasts.
+- OpenAI: latencia por resultado y tokens consumidos.
+- Idempotencia: cómo se resolvió cada clave (LRU, filtro de Bloom, BD).
+- Caché de transacciones: aciertos y fallos de GET /transactions/{id}.
+- Long-poll: peticiones esperando en /transactions/{id}/wait y cómo terminaron.
+- Relay de notificaciones: eventos de transaction_events publicados.
+- Encolado: transacciones por cola de prioridad y las limitadas por la cuota del usuario.
+
+El middleware es ASGI puro (sin BaseHTTPMiddleware) y las etiquetas tienen
+cardinalidad acotada, así que puede quedar activo en producción. Con
+PROMETHEUS_MULTIPROC_DIR definido se agregan las métricas de todos los
+workers del servidor.
+"""
+import os
+import time
+from contextvars import ContextVar
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Peticiones HTTP", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latencia de peticiones HTTP", ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Peticiones HTTP en curso", ["method", "route"],
+    multiprocess_mode="livesum"
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries", "Consultas SQL por petición", ["route"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "http_request_db_seconds", "Tiempo en la BD por petición", ["route"],
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Latencia de consultas SQL", buckets=LATENCY_BUCKETS
+)
+
+WS_CONNECTIONS = Gauge(
+    "websocket_connections", "Conexiones WebSocket activas", multiprocess_mode="livesum"
+)
+WS_USERS = Gauge(
+    "websocket_users", "Usuarios con al menos una conexión WebSocket", multiprocess_mode="livesum"
+)
+WS_MESSAGES = Counter(
+    "websocket_messages_sent_total", "Mensajes WebSocket enviados", ["kind", "outcome"]
+)
+WS_FANOUT = Histogram(
+    "websocket_broadcast_recipients", "Destinatarios por broadcast", ["kind"],
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+)
+WS_BROADCAST_LATENCY = Histogram(
+    "websocket_broadcast_duration_seconds", "Duración de un broadcast", ["kind"],
+    buckets=LATENCY_BUCKETS
+)
+
+OPENAI_LATENCY = Histogram(
+    "openai_request_duration_seconds", "Latencia de llamadas a OpenAI", ["model", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+)
+OPENAI_TOKENS = Counter(
+    "openai_tokens_total", "Tokens consumidos en OpenAI", ["model"]
+)
+
+IDEMPOTENCY_LOOKUPS = Counter(
+    "idempotency_lookups_total", "Resolución de claves de idempotencia al crear transacciones", ["result"]
+)
+
+TRANSACTION_CACHE_LOOKUPS = Counter(
+    "transaction_cache_lookups_total", "Lecturas de GET /transactions/{id} por resultado de la caché", ["result"]
+)
+
+TRANSACTION_WAITERS = Gauge(
+    "transaction_waiters", "Peticiones esperando cambios en /transactions/{id}/wait",
+    multiprocess_mode="livesum"
+)
+TRANSACTION_WAITS = Counter(
+    "transaction_waits_total", "Long-polls de transacciones por resultado", ["result"]
+)
+
+NOTIFICATION_RELAY_EVENTS = Counter(
+    "notification_relay_events_total", "Eventos de transacciones publicados por el relay"
+)
+
+TRANSACTIONS_ENQUEUED = Counter(
+    "transactions_enqueued_total", "Transacciones encoladas por cola", ["queue", "throttled"]
+)
+
+# [consultas, segundos] de la petición en curso
+_db_stats: ContextVar = ContextVar("db_stats", default=None)
+
+
+def instrument_engine(engine):
+    """Cuenta y mide las consultas del engine (por petición y en total)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_LATENCY.observe(elapsed)
+
+        stats = _db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+
+class MetricsMiddleware:
+    """Middleware ASGI de métricas HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _route(self, scope) -> str:
+        # La plantilla de la ruta mantiene acotada la cardinalidad
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = [0, 0.0]
+        token = _db_stats.set(stats)
+        in_progress = HTTP_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            in_progress.dec()
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats[0])
+            DB_TIME_PER_REQUEST.labels(route).observe(stats[1])
+            _db_stats.reset(token)
+
+
+def render_metrics():
+    """Cuerpo y content-type para GET /metrics"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
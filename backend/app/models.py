@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, Text, LargeBinary, ForeignKey
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 import enum
@@ -24,16 +25,61 @@ class Transaction(Base):
     monto = Column(Float, nullable=False)
     tipo = Column(String, nullable=False)
     estado = Column(String, default=TransactionStatus.PENDIENTE.value)
-    idempotency_key = Column(String, unique=True, index=True, nullable=True)
+    # Solo informativo: la unicidad por ventana de tiempo vive en idempotency_records
+    idempotency_key = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
+class IdempotencyRecord(Base):
+    """Clave de idempotencia vigente hasta expires_at (ver services/transaction_store.py)"""
+    __tablename__ = "idempotency_records"
+
+    key = Column(String, primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class TransactionEvent(Base):
+    """
+    Cambio de una transacción, solo se agrega (ver services/transaction_events.py).
+    El id creciente es el cursor de GET /transactions/changes.
+    """
+    __tablename__ = "transaction_events"
+    # En SQLite, AUTOINCREMENT: los ids nunca se reutilizan
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False, index=True)
+    event_type = Column(String, nullable=False)  # created, state_changed, snapshot
+    previous_estado = Column(String, nullable=True)
+    estado = Column(String, nullable=False)
+    # Copia de la fila: un consumidor puede replicarla sin leer transactions
+    user_id = Column(String, nullable=False)
+    monto = Column(Float, nullable=False)
+    tipo = Column(String, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class TextBlob(Base):
+    """Texto comprimido y direccionado por contenido (sha256), deduplicado"""
+    __tablename__ = "text_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)  # zlib
+    size = Column(Integer, nullable=False)  # Longitud del texto sin comprimir
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class SummaryRequest(Base):
     __tablename__ = "summary_requests"
 
     id = Column(Integer, primary_key=True, index=True)
-    original_text = Column(Text, nullable=False)
+    # NULL cuando el texto vive en text_blobs (ver services/text_storage.py)
+    stored_text = Column("original_text", Text, nullable=True)
+    text_hash = Column(String(64), ForeignKey("text_blobs.hash"), nullable=True, index=True)
     summary = Column(Text, nullable=True)
     model_used = Column(String, nullable=True)
     tokens_used = Column(Integer, nullable=True)
@@ -41,3 +87,17 @@ class SummaryRequest(Base):
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    text_blob = relationship(TextBlob, lazy="select")
+
+    @property
+    def original_text(self) -> str:
+        """Texto original, ya sea en línea o descomprimido desde text_blobs"""
+        if self.stored_text is not None or self.text_blob is None:
+            return self.stored_text
+        from .services.text_storage import decompress_text
+        return decompress_text(self.text_blob.data)
+
+    @original_text.setter
+    def original_text(self, value: str):
+        self.stored_text = value
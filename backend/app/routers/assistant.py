@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from ..database import get_db
 from ..models import SummaryRequest as SummaryRequestModel
-from ..schemas import SummarizeRequest, SummarizeResponse
+from ..schemas import (
+    SummarizeRequest, SummarizeResponse, SummaryListItem, SummarySearchHit, SummarySearchResponse
+)
 from ..services.openai_service import OpenAIService
+from ..services import text_storage, summary_search
 import os
 
 router = APIRouter(prefix="/assistant", tags=["assistant"])
@@ -13,6 +17,20 @@ router = APIRouter(prefix="/assistant", tags=["assistant"])
 # Inicializar servicio de OpenAI
 openai_service = OpenAIService(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Columnas seleccionables en el listado (fields=)
+SUMMARY_LIST_COLUMNS = {
+    "id": SummaryRequestModel.id,
+    "original_text": SummaryRequestModel.stored_text,
+    "summary": SummaryRequestModel.summary,
+    "model_used": SummaryRequestModel.model_used,
+    "tokens_used": SummaryRequestModel.tokens_used,
+    "status": SummaryRequestModel.status,
+    "created_at": SummaryRequestModel.created_at,
+    "completed_at": SummaryRequestModel.completed_at,
+}
+SUMMARY_TEXT_FIELDS = ("original_text", "summary")
+DEFAULT_LIST_FIELDS = list(SummarizeResponse.model_fields)
+
 
 @router.post("/summarize", response_model=SummarizeResponse, status_code=status.HTTP_201_CREATED)
 async def summarize_text(request: SummarizeRequest, db: Session = Depends(get_db)):
@@ -26,11 +44,11 @@ async def summarize_text(request: SummarizeRequest, db: Session = Depends(get_db
     """
     
     # Crear registro en BD
-    db_request = SummaryRequestModel(
-        original_text=request.text,
-        status="pending"
-    )
+    db_request = SummaryRequestModel(status="pending")
+    text_storage.attach_text(db, db_request, request.text)
     db.add(db_request)
+    db.flush()
+    summary_search.index_summary(db, db_request.id, request.text, None)
     db.commit()
     db.refresh(db_request)
     
@@ -44,6 +62,7 @@ async def summarize_text(request: SummarizeRequest, db: Session = Depends(get_db
         db_request.tokens_used = result.get("tokens_used")
         db_request.status = "completed"
         db_request.completed_at = datetime.utcnow()
+        summary_search.index_summary(db, db_request.id, request.text, db_request.summary)
         
         db.commit()
         db.refresh(db_request)
@@ -63,10 +82,16 @@ async def summarize_text(request: SummarizeRequest, db: Session = Depends(get_db
         )
 
 
-@router.get("/summaries", response_model=List[SummarizeResponse])
+@router.get(
+    "/summaries",
+    response_model=List[SummaryListItem],
+    response_model_exclude_unset=True
+)
 async def list_summaries(
     skip: int = 0,
     limit: int = 50,
+    fields: Optional[str] = None,
+    preview: Optional[int] = Query(None, ge=1),
     db: Session = Depends(get_db)
 ):
     """
@@ -74,14 +99,131 @@ async def list_summaries(
     
     - **skip**: Número de registros a saltar (paginación)
     - **limit**: Número máximo de registros a retornar
+    - **fields**: Campos a retornar separados por coma (ej. `id,summary,created_at`)
+    - **preview**: Trunca `original_text` y `summary` a N caracteres en la BD
+    
+    Solo se leen de la BD las columnas solicitadas.
     """
-    summaries = db.query(SummaryRequestModel).order_by(
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else DEFAULT_LIST_FIELDS
+    
+    unknown = [f for f in selected if f not in SUMMARY_LIST_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos no válidos: {', '.join(unknown)}"
+        )
+    
+    columns = []
+    for field in selected:
+        column = SUMMARY_LIST_COLUMNS[field]
+        if preview and field in SUMMARY_TEXT_FIELDS:
+            column = func.substr(column, 1, preview)
+        columns.append(column.label(field))
+    
+    # Los textos almacenados como blob se resuelven aparte
+    needs_blobs = "original_text" in selected
+    if needs_blobs:
+        columns.append(SummaryRequestModel.text_hash.label("text_hash"))
+    
+    rows = db.query(*columns).order_by(
         SummaryRequestModel.created_at.desc()
     ).offset(skip).limit(limit).all()
     
+    blobs = {}
+    if needs_blobs:
+        blobs = text_storage.load_texts(
+            db, (row.text_hash for row in rows if row.original_text is None), preview
+        )
+    
+    summaries = []
+    for row in rows:
+        item = {field: getattr(row, field) for field in selected}
+        if needs_blobs and item["original_text"] is None and row.text_hash in blobs:
+            item["original_text"] = blobs[row.text_hash]
+        summaries.append(SummaryListItem(**item))
+    
     return summaries
 
 
+@router.get("/summaries/search", response_model=SummarySearchResponse, response_model_exclude_unset=True)
+async def search_summaries(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    preview: int = Query(200, ge=1),
+    db: Session = Depends(get_db)
+):
+    """
+    Busca en los textos originales y resúmenes usando el índice de texto completo.
+    
+    - **q**: Términos a buscar
+    - **limit**: Número máximo de resultados
+    - **cursor**: Valor `next_cursor` de la página anterior
+    - **preview**: Longitud máxima de los textos retornados
+    
+    Resultados ordenados por relevancia. Las páginas siguientes solo incluyen
+    resúmenes que ya existían al pedir la primera.
+    """
+    if not summary_search.is_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Índice de búsqueda no disponible"
+        )
+    
+    if cursor:
+        try:
+            after, max_id = summary_search.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor no válido"
+            )
+    else:
+        after, max_id = None, summary_search.latest_id(db)
+    
+    hits = summary_search.search(db, q, limit, max_id, after)
+    if not hits:
+        return SummarySearchResponse(items=[], next_cursor=None)
+    
+    rows = db.query(
+        SummaryRequestModel.id,
+        func.substr(SummaryRequestModel.stored_text, 1, preview).label("original_text"),
+        SummaryRequestModel.text_hash,
+        func.substr(SummaryRequestModel.summary, 1, preview).label("summary"),
+        SummaryRequestModel.status,
+        SummaryRequestModel.created_at
+    ).filter(SummaryRequestModel.id.in_([summary_id for summary_id, _ in hits])).all()
+    rows_by_id = {row.id: row for row in rows}
+    
+    blobs = text_storage.load_texts(
+        db, (row.text_hash for row in rows if row.original_text is None), preview
+    )
+    
+    items = []
+    for summary_id, rank in hits:
+        row = rows_by_id.get(summary_id)
+        if row is None:
+            continue
+        original_text = row.original_text
+        if original_text is None and row.text_hash in blobs:
+            original_text = blobs[row.text_hash]
+        items.append(SummarySearchHit(
+            id=row.id,
+            original_text=original_text,
+            summary=row.summary,
+            status=row.status,
+            created_at=row.created_at,
+            rank=rank
+        ))
+    
+    next_cursor = None
+    if len(hits) == limit:
+        last_id, last_rank = hits[-1]
+        next_cursor = summary_search.encode_cursor(last_rank, last_id, max_id)
+    
+    return SummarySearchResponse(items=items, next_cursor=next_cursor)
+
+
 @router.get("/summaries/{summary_id}", response_model=SummarizeResponse)
 async def get_summary(summary_id: int, db: Session = Depends(get_db)):
     """
@@ -3,6 +3,8 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 from ..websocket_manager import manager
+from ..services.transaction_cache import cache_transaction, transaction_cache
+from ..services.transaction_waiters import transaction_waiters
 
 router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False)
 
@@ -19,10 +21,20 @@ class TransactionNotification(BaseModel):
 async def notify_transaction(notification: TransactionNotification, background_tasks: BackgroundTasks):
     """
     Endpoint interno para recibir notificaciones de cambios en transacciones.
-    Usado por el worker de Celery para notificar a los clientes WebSocket.
+    El worker ya no lo usa: sus cambios llegan por transaction_events y el
+    relay (services/notification_relay.py). Queda para productores externos.
     """
     transaction_data = notification.dict()
     
+    # El nuevo estado reemplaza la entrada en caché de GET /transactions/{id}
+    try:
+        entry = cache_transaction(transaction_data)
+        # Despierta los long-polls de GET /transactions/{id}/wait
+        transaction_waiters.notify(notification.id, entry)
+    except ValueError:
+        # Notificación incompleta: la próxima lectura irá a la BD
+        transaction_cache.invalidate(notification.id)
+    
     # Notificar a todos los clientes conectados
     background_tasks.add_task(manager.notify_transaction_change, transaction_data)
     
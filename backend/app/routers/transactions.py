@@ -1,15 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Dict, Literal, Optional, List
 from ..database import get_db
 from ..models import Transaction, TransactionStatus
-from ..schemas import TransactionCreate, TransactionResponse, AsyncProcessRequest, AsyncProcessResponse
+from ..schemas import (
+    TransactionCreate,
+    TransactionResponse,
+    TransactionChangesResponse,
+    AsyncProcessRequest,
+    AsyncProcessResponse,
+    BulkProcessRequest,
+    BulkProcessResponse,
+)
+from ..celery_app import celery_app
 from ..tasks import process_transaction
+from ..services.transaction_store import (
+    IDEMPOTENCY_AUTO_TTL,
+    IDEMPOTENCY_TTL,
+    IdempotencyConflict,
+    IdempotencyKeyReused,
+    create_transaction_once,
+    get_record,
+    record_as_dict,
+    replay,
+)
+from ..services.idempotency_cache import idempotency_cache
+from ..services.transaction_cache import cache_transaction, transaction_cache
+from ..services.transaction_events import changes_since
+from ..services.transaction_inflight import inflight_registry
+from ..services.user_fairness import plan_queues
+from ..services.transaction_waiters import is_terminal, transaction_waiters
+from ..metrics import (
+    IDEMPOTENCY_LOOKUPS,
+    TRANSACTION_CACHE_LOOKUPS,
+    TRANSACTION_WAITERS,
+    TRANSACTION_WAITS,
+    TRANSACTIONS_ENQUEUED,
+)
+from celery.utils import uuid
+import asyncio
 import hashlib
 import json
+import os
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
+MAX_WAIT_SECONDS = float(os.getenv("TRANSACTION_MAX_WAIT_SECONDS", "60"))
+
 def generate_idempotency_key(data: dict) -> str:
     """Genera una clave de idempotencia basada en el contenido"""
     content = json.dumps(data, sort_keys=True)
@@ -32,41 +69,65 @@ async def create_transaction(
     1. Header X-Idempotency-Key (recomendado)
     2. Campo idempotency_key en el body
     3. Generación automática basada en el contenido
-    """
     
-    # Determinar la clave de idempotencia
-    final_idempotency_key = (
-        idempotency_key or 
-        transaction.idempotency_key or 
-        generate_idempotency_key({
-            "user_id": transaction.user_id,
-            "monto": transaction.monto,
-            "tipo": transaction.tipo
-        })
-    )
-    
-    # Verificar si ya existe una transacción con esta clave
-    existing_transaction = db.query(Transaction).filter(
-        Transaction.idempotency_key == final_idempotency_key
-    ).first()
+    Mientras la clave está vigente (IDEMPOTENCY_TTL_SECONDS; las claves
+    automáticas, IDEMPOTENCY_AUTO_TTL_SECONDS) un reintento recibe la
+    transacción original con su estado actual. Reusar una clave vigente con
+    otro contenido da 422.
+    """
     
-    if existing_transaction:
-        # Retornar la transacción existente (idempotencia)
-        return existing_transaction
+    request_hash = generate_idempotency_key({
+        "user_id": transaction.user_id,
+        "monto": transaction.monto,
+        "tipo": transaction.tipo
+    })
     
-    # Crear nueva transacción
-    db_transaction = Transaction(
-        user_id=transaction.user_id,
-        monto=transaction.monto,
-        tipo=transaction.tipo,
-        idempotency_key=final_idempotency_key
-    )
+    # Determinar la clave de idempotencia y su vigencia
+    client_key = idempotency_key or transaction.idempotency_key
+    final_idempotency_key = client_key or request_hash
+    ttl = IDEMPOTENCY_TTL if client_key else IDEMPOTENCY_AUTO_TTL
     
     try:
-        db.add(db_transaction)
-        db.commit()
-        db.refresh(db_transaction)
-        return db_transaction
+        # Reintento reciente: se responde desde memoria
+        record = idempotency_cache.recent(final_idempotency_key)
+        if record is not None:
+            IDEMPOTENCY_LOOKUPS.labels("lru").inc()
+            return replay_transaction(db, record, request_hash)
+        
+        # Solo si el filtro de Bloom no descarta la clave se consulta la BD
+        if idempotency_cache.might_exist(final_idempotency_key):
+            existing = get_record(db, final_idempotency_key)
+            IDEMPOTENCY_LOOKUPS.labels("db_hit" if existing else "bloom_false_positive").inc()
+            if existing:
+                record = record_as_dict(existing)
+                idempotency_cache.remember(final_idempotency_key, record)
+                return replay_transaction(db, record, request_hash)
+        else:
+            IDEMPOTENCY_LOOKUPS.labels("bloom_new").inc()
+        
+        # Inserción atómica: si la clave está vigente se responde con el registro original
+        record, created = create_transaction_once(
+            db,
+            {"user_id": transaction.user_id, "monto": transaction.monto, "tipo": transaction.tipo},
+            final_idempotency_key,
+            request_hash,
+            ttl
+        )
+        idempotency_cache.remember(final_idempotency_key, record)
+        if created:
+            # Los clientes suelen consultar la transacción justo después de crearla
+            return cache_transaction(record["response"])["body"]
+        return replay_transaction(db, record, request_hash)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -75,6 +136,49 @@ async def create_transaction(
         )
 
 
+def enqueue_transactions(rows: List[tuple], priority: Optional[str] = None) -> Dict[int, dict]:
+    """
+    Encola las transacciones (id, user_id, tipo, monto) que no estén ya en vuelo.
+    Las marcas se toman en un round-trip (más reintentos de las que se liberan
+    entre SET y MGET), la cola de cada una sale de su
+    prioridad y de la cuota de su usuario, y los mensajes se publican con un
+    solo productor (una conexión al broker). Retorna {id: {status, task_id, queue}}.
+    """
+    task_ids = {row[0]: uuid() for row in rows}
+    results = {}
+    acquired_rows = []
+    published = 0
+    try:
+        acquired, owners = inflight_registry.acquire_many(task_ids)
+        for transaction_id, owner in owners.items():
+            results[transaction_id] = {"status": "already_queued", "task_id": owner}
+        
+        acquired_ids = set(acquired)
+        acquired_rows = [row for row in rows if row[0] in acquired_ids]
+        plan = plan_queues(acquired_rows, priority)
+        with celery_app.producer_or_acquire() as producer:
+            for transaction_id, *_ in acquired_rows:
+                queue, throttled = plan[transaction_id]
+                process_transaction.apply_async(
+                    (transaction_id,), task_id=task_ids[transaction_id], queue=queue, producer=producer
+                )
+                TRANSACTIONS_ENQUEUED.labels(queue, str(throttled).lower()).inc()
+                results[transaction_id] = {"status": "enqueued", "task_id": task_ids[transaction_id], "queue": queue}
+                published += 1
+    except Exception as e:
+        print(f"Error encolando transacciones: {e}")
+        # Las no publicadas liberan su marca para poder reintentarse
+        try:
+            inflight_registry.forget([row[0] for row in acquired_rows[published:]])
+        except Exception as e:
+            print(f"Error liberando marcas en vuelo: {e}")
+    
+    # Sin marca ni dueño tras los reintentos, o la publicación falló
+    for transaction_id in task_ids:
+        results.setdefault(transaction_id, {"status": "error", "task_id": None})
+    return results
+
+
 @router.post("/async-process", response_model=AsyncProcessResponse)
 async def async_process_transaction(
     request: AsyncProcessRequest,
@@ -87,6 +191,11 @@ async def async_process_transaction(
     
     La transacción se procesa en background mediante Celery + Redis.
     El worker simula procesamiento con sleep y puede fallar aleatoriamente.
+    Si ya está encolada o en proceso no se vuelve a encolar: se responde con
+    status "already_queued" y el task_id existente.
+    
+    La cola sale de **priority** (high, normal, low) o, sin ella, del tipo y
+    el monto: transferencias y montos altos van a la cola alta.
     """
     
     # Verificar que la transacción existe
@@ -107,14 +216,92 @@ async def async_process_transaction(
             detail="La transacción ya fue procesada"
         )
     
-    # Encolar la tarea
-    task = process_transaction.delay(request.transaction_id)
+    # Encolar la tarea (Redis y el broker son síncronos: fuera del event loop)
+    result = (await asyncio.to_thread(
+        enqueue_transactions,
+        [(transaction.id, transaction.user_id, transaction.tipo, transaction.monto)],
+        request.priority.value if request.priority else None
+    ))[transaction.id]
+    if result["status"] == "error":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No se pudo encolar la transacción"
+        )
+    
+    if result["status"] == "already_queued":
+        return AsyncProcessResponse(
+            message="La transacción ya está encolada o en proceso",
+            transaction_id=request.transaction_id,
+            task_id=result["task_id"],
+            status="already_queued"
+        )
     
     return AsyncProcessResponse(
         message="Transacción encolada para procesamiento",
         transaction_id=request.transaction_id,
-        task_id=task.id,
-        status="enqueued"
+        task_id=result["task_id"],
+        status="enqueued",
+        queue=result["queue"]
+    )
+
+
+@router.post("/async-process/bulk", response_model=BulkProcessResponse)
+def async_process_bulk(
+    request: BulkProcessRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Encola varias transacciones para procesamiento asíncrono.
+    
+    Se ejecuta en el threadpool: la consulta, Redis y el broker son
+    síncronos y con hasta 1000 IDs bloquearían el event loop.
+    
+    - **transaction_ids**: IDs a procesar (hasta 1000)
+    - Sin IDs, filtro: **user_id**, **estado** (por defecto pendiente) y **limit**
+    
+    - **priority**: high, normal o low (por defecto, según tipo y monto)
+    
+    Las transacciones ya encoladas o en proceso se omiten. Retorna el
+    resultado por ID: enqueued (con su cola), already_queued,
+    already_processed, not_found o error. Lo que supere la cuota por
+    usuario (TRANSACTION_USER_RATE/BURST) va a la cola de excedente.
+    """
+    query = db.query(
+        Transaction.id, Transaction.estado, Transaction.user_id, Transaction.tipo, Transaction.monto
+    )
+    if request.transaction_ids is not None:
+        requested = list(dict.fromkeys(request.transaction_ids))
+        query = query.filter(Transaction.id.in_(requested))
+        rows = {row.id: row for row in query}
+    else:
+        query = query.filter(Transaction.estado == request.estado.value)
+        if request.user_id:
+            query = query.filter(Transaction.user_id == request.user_id)
+        rows = {row.id: row for row in query.order_by(Transaction.id).limit(request.limit)}
+        requested = list(rows)
+    
+    results = {}
+    candidates = []
+    for transaction_id in requested:
+        row = rows.get(transaction_id)
+        if row is None:
+            results[transaction_id] = {"status": "not_found", "task_id": None}
+        elif row.estado == TransactionStatus.PROCESADO.value:
+            results[transaction_id] = {"status": "already_processed", "task_id": None}
+        else:
+            candidates.append((row.id, row.user_id, row.tipo, row.monto))
+    
+    if candidates:
+        results.update(enqueue_transactions(
+            candidates, request.priority.value if request.priority else None
+        ))
+    
+    return BulkProcessResponse(
+        enqueued=sum(1 for result in results.values() if result["status"] == "enqueued"),
+        results=[
+            {"transaction_id": transaction_id, **results[transaction_id]}
+            for transaction_id in requested
+        ]
     )
 
 @router.get("/list", response_model=List[TransactionResponse])
@@ -144,14 +331,34 @@ async def list_transactions(
     transactions = query.offset(skip).limit(limit).all()
     return transactions
 
-@router.get("/{transaction_id}", response_model=TransactionResponse)
-async def get_transaction(
-    transaction_id: int,
+@router.get("/changes", response_model=TransactionChangesResponse)
+async def list_transaction_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db)
 ):
     """
-    Obtiene una transacción específica por ID.
+    Feed de cambios: eventos de creación y cambio de estado posteriores al cursor.
+    
+    - **since**: `next_cursor` de la respuesta anterior (0 para empezar desde el inicio)
+    - **limit**: Número máximo de eventos a retornar
+    
+    Los eventos se retornan en el orden en que se confirmaron e incluyen una
+    copia de la transacción. Con `has_more` en false el consumidor está al día
+    y puede volver a consultar más tarde con el mismo `next_cursor`.
     """
+    events = changes_since(db, since, limit + 1)
+    has_more = len(events) > limit
+    events = events[:limit]
+    
+    return TransactionChangesResponse(
+        items=events,
+        next_cursor=events[-1].id if events else since,
+        has_more=has_more
+    )
+
+def load_transaction_entry(db: Session, transaction_id: int) -> dict:
+    """Lee la transacción de la BD y actualiza la caché; 404 si no existe"""
     transaction = db.query(Transaction).filter(
         Transaction.id == transaction_id
     ).first()
@@ -162,7 +369,113 @@ async def get_transaction(
             detail=f"Transacción {transaction_id} no encontrada"
         )
     
-    return transaction
+    return cache_transaction(transaction)
+
+def replay_transaction(db: Session, record: dict, request_hash: str) -> dict:
+    """Estado actual de la transacción de un registro de idempotencia (caché o BD)"""
+    transaction_id = replay(record, request_hash)
+    entry = transaction_cache.get(transaction_id)
+    TRANSACTION_CACHE_LOOKUPS.labels("hit" if entry else "miss").inc()
+    if entry is None:
+        entry = load_transaction_entry(db, transaction_id)
+    return entry["body"]
+
+def entry_response(entry: dict, response: Response, if_none_match: Optional[str]):
+    """Cuerpo de la entrada con su ETag, o 304 si coincide con If-None-Match"""
+    headers = {"ETag": entry["etag"], "Cache-Control": "no-cache"}
+    if if_none_match and entry["etag"] in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return entry["body"]
+
+@router.get("/{transaction_id}", response_model=TransactionResponse)
+async def get_transaction(
+    transaction_id: int,
+    response: Response,
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Obtiene una transacción específica por ID.
+    
+    Se sirve desde caché (actualizada con cada cambio de estado). La respuesta
+    incluye un ETag: con If-None-Match y sin cambios se responde 304.
+    """
+    entry = transaction_cache.get(transaction_id)
+    TRANSACTION_CACHE_LOOKUPS.labels("hit" if entry else "miss").inc()
+    
+    if entry is None:
+        entry = load_transaction_entry(db, transaction_id)
+    
+    return entry_response(entry, response, if_none_match)
+
+
+@router.get("/{transaction_id}/wait", response_model=TransactionResponse)
+async def wait_transaction(
+    transaction_id: int,
+    response: Response,
+    timeout: float = Query(30, gt=0, le=MAX_WAIT_SECONDS),
+    until: Literal["terminal", "change"] = "terminal",
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Long-poll: mantiene la petición abierta hasta que la transacción cambie.
+    
+    - **timeout**: segundos máximos de espera (hasta MAX_WAIT_SECONDS)
+    - **until**: `terminal` espera a procesado/fallido; `change` al próximo
+      cambio de estado (respecto al ETag de If-None-Match si se envía)
+    
+    Responde de inmediato si la condición ya se cumple. La espera la resuelve
+    el relay de eventos de transacciones, sin consultar la BD. Al vencer el timeout se
+    responde con el estado actual (o 304 si coincide con If-None-Match).
+    """
+    entry = transaction_cache.get(transaction_id)
+    TRANSACTION_CACHE_LOOKUPS.labels("hit" if entry else "miss").inc()
+    if entry is None:
+        entry = load_transaction_entry(db, transaction_id)
+    
+    # Estado de referencia para until=change
+    seen = {entry["etag"]}
+    if if_none_match:
+        seen = {tag.strip() for tag in if_none_match.split(",")}
+    
+    def satisfied(current: dict) -> bool:
+        if until == "terminal":
+            return is_terminal(current["body"])
+        return current["etag"] not in seen
+    
+    if satisfied(entry):
+        TRANSACTION_WAITS.labels("immediate").inc()
+        return entry_response(entry, response, if_none_match)
+    
+    # La conexión vuelve al pool: la espera no la retiene
+    db.close()
+    
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    with TRANSACTION_WAITERS.track_inprogress():
+        while True:
+            notified = await transaction_waiters.wait(transaction_id, deadline - loop.time())
+            if notified is None:
+                # Sin eventos en el plazo: se relee de la BD por si se perdió alguno
+                TRANSACTION_WAITS.labels("timeout").inc()
+                try:
+                    entry = load_transaction_entry(db, transaction_id)
+                finally:
+                    # Los timeouts llegan en ráfaga: ninguno retiene su conexión
+                    db.close()
+                break
+            entry = notified
+            if satisfied(entry):
+                TRANSACTION_WAITS.labels("notified").inc()
+                break
+            if loop.time() >= deadline:
+                TRANSACTION_WAITS.labels("timeout").inc()
+                break
+    
+    return entry_response(entry, response, if_none_match)
 
 
 from fastapi import WebSocket, WebSocketDisconnect
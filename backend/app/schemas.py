@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -31,14 +31,57 @@ class TransactionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class TransactionEventResponse(BaseModel):
+    id: int
+    transaction_id: int
+    event_type: str
+    previous_estado: Optional[str] = None
+    estado: str
+    user_id: str
+    monto: float
+    tipo: str
+    occurred_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class TransactionChangesResponse(BaseModel):
+    items: List[TransactionEventResponse]
+    next_cursor: int
+    has_more: bool
+
+class TransactionPriority(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
 class AsyncProcessRequest(BaseModel):
     transaction_id: int = Field(..., description="ID de la transacción a procesar")
+    priority: Optional[TransactionPriority] = Field(None, description="Prioridad (por defecto, según tipo y monto)")
 
 class AsyncProcessResponse(BaseModel):
     message: str
     transaction_id: int
     task_id: str
     status: str
+    queue: Optional[str] = None
+
+class BulkProcessRequest(BaseModel):
+    transaction_ids: Optional[List[int]] = Field(None, max_length=1000, description="IDs a procesar")
+    user_id: Optional[str] = Field(None, description="Sin IDs: filtrar por usuario")
+    estado: TransactionStatus = Field(TransactionStatus.PENDIENTE, description="Sin IDs: filtrar por estado")
+    limit: int = Field(1000, ge=1, le=1000, description="Sin IDs: máximo de transacciones")
+    priority: Optional[TransactionPriority] = Field(None, description="Prioridad (por defecto, según tipo y monto)")
+
+class BulkProcessResult(BaseModel):
+    transaction_id: int
+    status: str  # enqueued, already_queued, already_processed, not_found, error
+    task_id: Optional[str] = None
+    queue: Optional[str] = None
+
+class BulkProcessResponse(BaseModel):
+    enqueued: int
+    results: List[BulkProcessResult]
 
 
 class SummarizeRequest(BaseModel):
@@ -56,3 +99,27 @@ class SummarizeResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SummaryListItem(BaseModel):
+    """Proyección de SummarizeResponse para listados (campos opcionales y textos truncados)"""
+    id: Optional[int] = None
+    original_text: Optional[str] = None
+    summary: Optional[str] = None
+    model_used: Optional[str] = None
+    tokens_used: Optional[int] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SummarySearchHit(SummaryListItem):
+    rank: float
+
+
+class SummarySearchResponse(BaseModel):
+    items: List[SummarySearchHit]
+    next_cursor: Optional[str] = None
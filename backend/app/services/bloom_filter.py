@@ -0,0 +1,60 @@
+"""
+Filtro de Bloom en memoria.
+
+Lo usa la caché de claves de idempotencia (y su variante en Redis).
+rpa/crawler.py tiene una copia: el RPA se despliega sin el backend, así que
+un cambio aquí se replica allí.
+
+Un "no está" es seguro; un "está" puede ser un falso positivo con
+probabilidad error_rate mientras no se supere la capacidad (~1.2 MB por
+millón de elementos con 1%).
+"""
+import hashlib
+import math
+import threading
+from typing import Iterable
+
+
+def bloom_parameters(capacity: int, error_rate: float):
+    """(bits, funciones hash) óptimos para la capacidad y tasa de falsos positivos"""
+    size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+    return size, max(1, round(size / capacity * math.log(2)))
+
+
+class BloomFilter:
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.size, self.hashes = bloom_parameters(capacity, error_rate)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key: str):
+        # Doble hashing (Kirsch-Mitzenmacher) sobre un único digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def _set(self, key: str) -> bool:
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def add_many(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._set(key)
+
+    def add(self, key: str) -> bool:
+        """Agrega la clave; retorna False si (probablemente) ya estaba"""
+        with self._lock:
+            return self._set(key)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
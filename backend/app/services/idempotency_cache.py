@@ -0,0 +1,139 @@
+"""
+Caché de claves de idempotencia.
+
+- Filtro de Bloom con todas las claves conocidas: si responde "no está", la
+  clave es nueva con seguridad y se inserta directamente. Solo un "quizás"
+  cuesta una lectura por clave (las claves expiradas siguen en el filtro
+  hasta el próximo arranque; solo cuestan esa lectura). Se reconstruye al
+  arrancar desde las claves vigentes de idempotency_records y se actualiza
+  en cada inserción. Con IDEMPOTENCY_BLOOM_REDIS los bits viven en Redis y
+  los comparten todos los procesos de la API.
+- LRU de clave -> (ID de la transacción, hash de la petición, expiración)
+  de las transacciones creadas recientemente: un reintento se resuelve sin
+  buscar la clave en la BD mientras está vigente. Solo se guarda el ID: la
+  respuesta es el estado actual de la transacción (caché de transacciones o
+  lectura por clave primaria), no el de su creación.
+
+Un filtro por proceso no es incorrecto con varios workers: una clave creada
+en otro proceso se detecta igual con el INSERT ... ON CONFLICT.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+from sqlalchemy import select
+from ..models import IdempotencyRecord
+from .bloom_filter import BloomFilter, bloom_parameters
+from .transaction_store import utcnow
+
+BLOOM_CAPACITY = int(os.getenv("IDEMPOTENCY_BLOOM_CAPACITY", "1000000"))
+BLOOM_ERROR_RATE = float(os.getenv("IDEMPOTENCY_BLOOM_ERROR_RATE", "0.01"))
+BLOOM_REDIS = os.getenv("IDEMPOTENCY_BLOOM_REDIS", "false").lower() in ("1", "true", "yes")
+LRU_SIZE = int(os.getenv("IDEMPOTENCY_LRU_SIZE", "10000"))
+
+
+class RedisBloomFilter(BloomFilter):
+    """Mismo filtro, con los bits en un string de Redis compartido"""
+
+    def __init__(
+        self,
+        redis_url: str,
+        key: str = "idempotency:bloom",
+        capacity: int = BLOOM_CAPACITY,
+        error_rate: float = BLOOM_ERROR_RATE
+    ):
+        import redis
+
+        self.size, self.hashes = bloom_parameters(capacity, error_rate)
+        self.client = redis.Redis.from_url(redis_url)
+        self.key = key
+
+    def add(self, key: str) -> bool:
+        pipe = self.client.pipeline(transaction=False)
+        for position in self._positions(key):
+            pipe.setbit(self.key, position, 1)
+        # SETBIT retorna el bit anterior: False si ya estaban todos
+        return not all(pipe.execute())
+
+    def add_many(self, keys: Iterable[str]):
+        pipe = self.client.pipeline(transaction=False)
+        for index, key in enumerate(keys, 1):
+            for position in self._positions(key):
+                pipe.setbit(self.key, position, 1)
+            if index % 1000 == 0:
+                pipe.execute()
+        pipe.execute()
+
+    def __contains__(self, key: str) -> bool:
+        pipe = self.client.pipeline(transaction=False)
+        for position in self._positions(key):
+            pipe.getbit(self.key, position)
+        return all(pipe.execute())
+
+
+class LRUCache:
+    def __init__(self, max_size: int = LRU_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+class IdempotencyCache:
+    def __init__(self, bloom: BloomFilter, lru: LRUCache):
+        self.bloom = bloom
+        self.lru = lru
+
+    @classmethod
+    def from_env(cls) -> "IdempotencyCache":
+        if BLOOM_REDIS:
+            bloom = RedisBloomFilter(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        else:
+            bloom = BloomFilter(BLOOM_CAPACITY, BLOOM_ERROR_RATE)
+        return cls(bloom, LRUCache())
+
+    def warm_up(self, engine, batch_size: int = 10000) -> int:
+        """Carga en el filtro todas las claves vigentes"""
+        loaded = 0
+        with engine.connect() as conn:
+            result = conn.execution_options(yield_per=batch_size).execute(
+                select(IdempotencyRecord.key).where(IdempotencyRecord.expires_at > utcnow())
+            )
+            for rows in result.partitions():
+                self.bloom.add_many(key for (key,) in rows)
+                loaded += len(rows)
+        return loaded
+
+    def recent(self, key: str) -> Optional[dict]:
+        """Registro vigente de una transacción creada recientemente con esta clave"""
+        record = self.lru.get(key)
+        if record is None or record["expires_at"] <= utcnow():
+            return None
+        return record
+
+    def might_exist(self, key: str) -> bool:
+        return key in self.bloom
+
+    def remember(self, key: str, record: dict):
+        self.bloom.add(key)
+        self.lru.put(key, {
+            "request_hash": record["request_hash"],
+            "transaction_id": record["transaction_id"],
+            "expires_at": record["expires_at"]
+        })
+
+
+idempotency_cache = IdempotencyCache.from_env()
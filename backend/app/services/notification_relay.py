@@ -0,0 +1,88 @@
+"""
+Relay de notificaciones de transacciones (outbox).
+
+transaction_events (ver transaction_events.py) se escribe en el mismo commit
+que cada creación y cambio de estado, así que hace de outbox: un cambio
+confirmado siempre tiene su evento, aunque el worker muera justo después del
+commit, y la tarea ya no hace una llamada HTTP por notificación.
+
+Cada proceso de la API lee el registro a partir del último evento publicado,
+en lotes, y publica a sus propios suscriptores:
+
+- caché de GET /transactions/{id}
+- long-polls de /transactions/{id}/wait
+- clientes WebSocket (todos y los del usuario)
+
+Por lote hay una consulta de eventos y una de las filas actuales; varios
+eventos de la misma transacción se publican una sola vez, con su último
+estado. El cursor avanza después de publicar (entrega al menos una vez), vive
+en memoria y arranca al final del registro: un proceso solo tiene
+suscriptores desde que arrancó. Con varios procesos de la API cada uno recibe
+todos los eventos.
+"""
+import asyncio
+import os
+from typing import List, Optional, Tuple
+from sqlalchemy import func, select
+from ..metrics import NOTIFICATION_RELAY_EVENTS
+from ..models import Transaction, TransactionEvent
+from ..websocket_manager import manager
+from .transaction_cache import cache_transaction
+from .transaction_events import changes_since
+from .transaction_waiters import transaction_waiters
+
+RELAY_INTERVAL = float(os.getenv("NOTIFICATION_RELAY_INTERVAL_SECONDS", "0.25"))
+RELAY_BATCH_SIZE = int(os.getenv("NOTIFICATION_RELAY_BATCH_SIZE", "500"))
+
+
+class NotificationRelay:
+    def __init__(self, session_factory, batch_size: int = RELAY_BATCH_SIZE, interval: float = RELAY_INTERVAL):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.cursor: Optional[int] = None
+
+    def fetch(self) -> Tuple[int, int, List[dict]]:
+        """
+        Lee el siguiente lote (en un hilo, fuera del event loop).
+        Retorna (cursor nuevo, eventos leídos, entradas de caché a publicar).
+        """
+        db = self.session_factory()
+        try:
+            if self.cursor is None:
+                self.cursor = db.scalar(select(func.coalesce(func.max(TransactionEvent.id), 0)))
+            events = changes_since(db, self.cursor, self.batch_size)
+            if not events:
+                return self.cursor, 0, []
+
+            # Una publicación por transacción, en el orden de su último evento
+            order = list(dict.fromkeys(event.transaction_id for event in reversed(events)))[::-1]
+            rows = {
+                transaction.id: transaction
+                for transaction in db.query(Transaction).filter(Transaction.id.in_(order))
+            }
+            entries = [cache_transaction(rows[transaction_id]) for transaction_id in order if transaction_id in rows]
+            return events[-1].id, len(events), entries
+        finally:
+            db.close()
+
+    async def publish(self, entry: dict):
+        body = entry["body"]
+        transaction_waiters.notify(body["id"], entry)
+        await manager.notify_transaction_change(body)
+        await manager.notify_transaction_to_user(body["user_id"], body)
+
+    async def run(self):
+        while True:
+            try:
+                cursor, count, entries = await asyncio.to_thread(self.fetch)
+                for entry in entries:
+                    await self.publish(entry)
+                self.cursor = cursor
+                NOTIFICATION_RELAY_EVENTS.inc(count)
+                if count == self.batch_size:
+                    # Hay más eventos pendientes: se sigue sin esperar
+                    continue
+            except Exception as e:
+                print(f"Error publicando eventos de transacciones: {e}")
+            await asyncio.sleep(self.interval)
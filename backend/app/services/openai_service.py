@@ -1,5 +1,9 @@
 import os
+import time
 from typing import Dict, Optional
+from ..metrics import OPENAI_LATENCY, OPENAI_TOKENS
+
+OPENAI_MODEL = "gpt-3.5-turbo"
 
 
 class OpenAIService:
@@ -33,9 +37,10 @@ class OpenAIService:
         if self.use_mock:
             return self._mock_summarize(text)
         
+        started = time.perf_counter()
         try:
             response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=OPENAI_MODEL,
                 messages=[
                     {
                         "role": "system",
@@ -52,6 +57,9 @@ class OpenAIService:
             
             summary = response.choices[0].message.content.strip()
             
+            OPENAI_LATENCY.labels(response.model, "ok").observe(time.perf_counter() - started)
+            OPENAI_TOKENS.labels(response.model).inc(response.usage.total_tokens)
+            
             return {
                 "summary": summary,
                 "model": response.model,
@@ -59,6 +67,7 @@ class OpenAIService:
             }
             
         except Exception as e:
+            OPENAI_LATENCY.labels(OPENAI_MODEL, "error").observe(time.perf_counter() - started)
             print(f"Error calling OpenAI API: {e}")
             # Fallback a mock si falla la API
             return self._mock_summarize(text)
@@ -80,6 +89,8 @@ class OpenAIService:
         # Agregar estadísticas básicas
         summary = f"[MOCK] Resumen del texto ({word_count} palabras): {summary}"
         
+        OPENAI_TOKENS.labels("mock-gpt-3.5-turbo").inc(word_count + 50)
+        
         return {
             "summary": summary,
             "model": "mock-gpt-3.5-turbo",
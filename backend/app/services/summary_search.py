@@ -0,0 +1,194 @@
+"""
+Índice de texto completo sobre summary_requests.
+
+- SQLite: tabla virtual FTS5 `summary_search` (rowid = id del resumen), ranking bm25.
+- PostgreSQL: columna `search_vector` (tsvector) con índice GIN, ranking ts_rank_cd.
+
+El índice se mantiene desde la aplicación al crear y al completar un resumen,
+porque el texto original puede vivir comprimido en text_blobs (por la misma
+razón el relleno inicial descomprime los blobs en Python, por lotes de
+BACKFILL_BATCH_SIZE filas leídas por keyset sobre el id).
+
+La paginación es por keyset sobre (rank, id): el cursor lleva el último
+(rank, id) entregado y el id máximo de la primera página, así que una página
+no salta un prefijo con OFFSET y los resúmenes creados después no entran en
+las siguientes. bm25 depende de estadísticas de todo el índice: si entre
+páginas cambia el índice, resultados de relevancia casi igual pueden
+repetirse u omitirse en el borde de la página.
+"""
+
+import math
+import re
+from typing import List, Optional, Tuple
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from .text_storage import decompress_text
+
+TS_CONFIG = "simple"
+BACKFILL_BATCH_SIZE = 500
+
+_dialect: Optional[str] = None
+_available = False
+
+
+def setup_search_index(engine: Engine) -> None:
+    """Crea el índice si no existe y lo rellena con los resúmenes previos"""
+    global _dialect, _available
+    _dialect = engine.dialect.name
+
+    try:
+        with engine.begin() as conn:
+            if _dialect == "sqlite":
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'summary_search'"
+                )).first()
+                if not exists:
+                    conn.execute(text(
+                        "CREATE VIRTUAL TABLE summary_search USING fts5("
+                        "original_text, summary, tokenize = 'unicode61 remove_diacritics 2')"
+                    ))
+                    _backfill(conn)
+            elif _dialect == "postgresql":
+                columns = [c["name"] for c in inspect(conn).get_columns("summary_requests")]
+                if "search_vector" not in columns:
+                    conn.execute(text("ALTER TABLE summary_requests ADD COLUMN search_vector tsvector"))
+                    _backfill(conn)
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_summary_requests_search_vector "
+                    "ON summary_requests USING GIN (search_vector)"
+                ))
+            else:
+                return
+        _available = True
+    except Exception as e:
+        print(f"⚠️  No se pudo crear el índice de búsqueda: {e}")
+
+
+def _backfill(conn: Connection) -> None:
+    """Indexa los resúmenes existentes, con el texto de text_blobs cuando no está en línea"""
+    if _dialect == "sqlite":
+        statement = text(
+            "INSERT INTO summary_search (rowid, original_text, summary) "
+            "VALUES (:id, :original_text, :summary)"
+        )
+    else:
+        statement = text(
+            f"UPDATE summary_requests SET search_vector = "
+            f"to_tsvector('{TS_CONFIG}', :original_text || ' ' || :summary) WHERE id = :id"
+        )
+
+    batch = text(
+        "SELECT s.id, s.original_text, s.summary, b.data FROM summary_requests s "
+        "LEFT JOIN text_blobs b ON b.hash = s.text_hash "
+        "WHERE s.id > :last_id ORDER BY s.id LIMIT :limit"
+    )
+
+    # Solo un lote (filas y textos descomprimidos) en memoria a la vez
+    last_id = 0
+    while True:
+        rows = conn.execute(batch, {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        conn.execute(statement, [
+            {
+                "id": row.id,
+                "original_text": row.original_text if row.original_text is not None
+                else decompress_text(row.data) if row.data is not None else "",
+                "summary": row.summary or "",
+            }
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+
+def is_available() -> bool:
+    return _available
+
+
+def index_summary(db: Session, summary_id: int, original_text: str, summary: Optional[str]) -> None:
+    """Inserta o actualiza la entrada del índice (en la transacción de la sesión)"""
+    if not _available:
+        return
+
+    params = {"id": summary_id, "original_text": original_text or "", "summary": summary or ""}
+
+    if _dialect == "sqlite":
+        db.execute(text("DELETE FROM summary_search WHERE rowid = :id"), {"id": summary_id})
+        db.execute(text(
+            "INSERT INTO summary_search (rowid, original_text, summary) "
+            "VALUES (:id, :original_text, :summary)"
+        ), params)
+    else:
+        db.execute(text(
+            f"UPDATE summary_requests SET search_vector = "
+            f"to_tsvector('{TS_CONFIG}', :original_text || ' ' || :summary) WHERE id = :id"
+        ), params)
+
+
+def encode_cursor(rank: float, last_id: int, max_id: int) -> str:
+    # repr conserva el float exacto: la siguiente página compara por igualdad
+    return f"{rank!r}:{last_id}:{max_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[Tuple[float, int], int]:
+    """Retorna ((rank, id) del último resultado, id máximo); lanza ValueError si no es válido"""
+    rank, last_id, max_id = cursor.split(":")
+    rank = float(rank)
+    if not math.isfinite(rank):
+        raise ValueError("rank no finito")
+    return (rank, int(last_id)), int(max_id)
+
+
+def latest_id(db: Session) -> int:
+    """Id más alto indexable: fija el conjunto de resultados de una búsqueda paginada"""
+    return db.execute(text("SELECT coalesce(max(id), 0) FROM summary_requests")).scalar()
+
+
+def _fts5_query(q: str) -> str:
+    """Convierte el texto libre en términos entrecomillados (AND implícito) para FTS5"""
+    terms = re.findall(r"\w+", q, flags=re.UNICODE)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def search(
+    db: Session,
+    q: str,
+    limit: int,
+    max_id: int,
+    after: Optional[Tuple[float, int]] = None
+) -> List[Tuple[int, float]]:
+    """
+    Retorna [(id, rank)] con id <= max_id, ordenados por relevancia, a partir
+    del (rank, id) `after` excluido. En ambos dialectos un rank menor
+    significa más relevante.
+    """
+    if _dialect == "sqlite":
+        match = _fts5_query(q)
+        if not match:
+            return []
+        sql = (
+            "SELECT id, rank FROM ("
+            "  SELECT rowid AS id, rank FROM summary_search WHERE summary_search MATCH :q"
+            ")"
+        )
+        params = {"q": match}
+    else:
+        # Se niega ts_rank_cd para que el orden ascendente sea el más relevante
+        sql = (
+            "SELECT id, rank FROM ("
+            f"  SELECT id, -ts_rank_cd(search_vector, websearch_to_tsquery('{TS_CONFIG}', :q)) AS rank"
+            "  FROM summary_requests"
+            f"  WHERE search_vector @@ websearch_to_tsquery('{TS_CONFIG}', :q)"
+            ") AS hits"
+        )
+        params = {"q": q}
+
+    sql += " WHERE id <= :max_id"
+    params.update({"max_id": max_id, "limit": limit})
+    if after is not None:
+        sql += " AND (rank, id) > (:last_rank, :last_id)"
+        params.update({"last_rank": after[0], "last_id": after[1]})
+    sql += " ORDER BY rank, id LIMIT :limit"
+
+    return [(row.id, row.rank) for row in db.execute(text(sql), params)]
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import zlib
+from typing import Dict, Iterable, Optional
+from sqlalchemy import func, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models import SummaryRequest, TextBlob
+
+# Activa el almacenamiento comprimido de original_text en text_blobs
+BLOB_STORAGE_ENABLED = os.getenv("SUMMARY_BLOB_STORAGE", "false").lower() in ("1", "true", "yes")
+
+# Por debajo de este tamaño no compensa comprimir ni deduplicar
+BLOB_MIN_SIZE = int(os.getenv("SUMMARY_BLOB_MIN_SIZE", "512"))
+
+
+def text_hash(text: str) -> str:
+    """Hash sha256 del texto, usado como clave del blob"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def setup_text_storage(engine) -> None:
+    """
+    Migra summary_requests de antes de text_blobs: agrega text_hash y permite
+    original_text NULL. Es idempotente; en SQLite, que no puede cambiar la
+    nulabilidad de una columna, la tabla se reconstruye.
+    """
+    columns = {c["name"]: c for c in inspect(engine).get_columns("summary_requests")}
+    table = SummaryRequest.__table__
+
+    with engine.begin() as conn:
+        if "text_hash" not in columns:
+            conn.execute(text("ALTER TABLE summary_requests ADD COLUMN text_hash VARCHAR(64) REFERENCES text_blobs (hash)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_summary_requests_text_hash ON summary_requests (text_hash)"))
+            print("🗜️  summary_requests.text_hash agregada")
+
+        if columns["original_text"]["nullable"]:
+            return
+
+        if engine.dialect.name == "sqlite":
+            names = ", ".join(column.name for column in table.columns)
+            for index in inspect(conn).get_indexes("summary_requests"):
+                conn.execute(text(f"DROP INDEX {index['name']}"))
+            conn.execute(text("ALTER TABLE summary_requests RENAME TO summary_requests_old"))
+            table.create(conn)
+            conn.execute(text(f"INSERT INTO summary_requests ({names}) SELECT {names} FROM summary_requests_old"))
+            conn.execute(text("DROP TABLE summary_requests_old"))
+        else:
+            conn.execute(text("ALTER TABLE summary_requests ALTER COLUMN original_text DROP NOT NULL"))
+        print("🗜️  summary_requests.original_text admite NULL (texto en text_blobs)")
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def compressed_prefix_size(chars: int) -> int:
+    """
+    Bytes comprimidos que bastan para recuperar los primeros `chars` caracteres:
+    hasta 4 bytes UTF-8 por carácter, deflate usa como mucho 15 bits por byte
+    de salida, más los encabezados de zlib y de bloque.
+    """
+    return 8 * chars + 1024
+
+
+def decompress_prefix(data: bytes, chars: int) -> str:
+    """Primeros `chars` caracteres de un blob (o de un prefijo suyo) sin descomprimirlo entero"""
+    head = zlib.decompressobj().decompress(data, 4 * chars)
+    return head.decode("utf-8", errors="ignore")[:chars]
+
+
+def store_text(db: Session, text: str) -> str:
+    """
+    Guarda el texto comprimido en text_blobs si aún no existe.
+    Retorna el hash; textos repetidos (p. ej. reenvíos del RPA) se guardan una sola vez.
+    """
+    key = text_hash(text)
+
+    if db.get(TextBlob, key) is not None:
+        return key
+
+    try:
+        # Savepoint: otra petición pudo insertar el mismo blob en paralelo
+        with db.begin_nested():
+            db.add(TextBlob(hash=key, data=compress_text(text), size=len(text)))
+    except IntegrityError:
+        pass
+
+    return key
+
+
+def attach_text(db: Session, summary_request, text: str) -> None:
+    """
+    Asigna el texto original a un SummaryRequest, en línea o como blob
+    según la configuración.
+    """
+    if BLOB_STORAGE_ENABLED and len(text) >= BLOB_MIN_SIZE:
+        summary_request.text_hash = store_text(db, text)
+        summary_request.stored_text = None
+    else:
+        summary_request.stored_text = text
+
+
+def load_texts(db: Session, hashes: Iterable[str], preview: Optional[int] = None) -> Dict[str, str]:
+    """
+    Carga y descomprime varios blobs en una sola consulta. Con preview solo se
+    lee de la BD el prefijo comprimido necesario para esos caracteres.
+    """
+    keys = {h for h in hashes if h}
+    if not keys:
+        return {}
+
+    if preview:
+        data_column = func.substr(TextBlob.data, 1, compressed_prefix_size(preview))
+        rows = db.query(TextBlob.hash, data_column).filter(TextBlob.hash.in_(keys)).all()
+        return {key: decompress_prefix(data, preview) for key, data in rows}
+
+    rows = db.query(TextBlob.hash, TextBlob.data).filter(TextBlob.hash.in_(keys)).all()
+    return {key: decompress_text(data) for key, data in rows}
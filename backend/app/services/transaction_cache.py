@@ -0,0 +1,140 @@
+"""
+Caché de lectura de transacciones para GET /transactions/{id}.
+
+- Read-through: si la transacción no está en caché se lee de la BD y se guarda.
+- Se actualiza con los mismos eventos que notifican a los WebSockets (el
+  relay de transaction_events, ver notification_relay.py) y al crear una
+  transacción, así que los clientes que hacen polling ven el cambio de
+  estado sin esperar al TTL.
+  El TTL solo acota el tiempo de una entrada si se pierde una notificación.
+- Cada entrada lleva un ETag: un poll con If-None-Match sin cambios recibe 304.
+- Cada entrada lleva una versión (updated_at, o created_at si nunca cambió):
+  una lectura de la BD que llega tarde (un miss leyó la fila antes de que el
+  relay publicara el cambio) no reemplaza una entrada más nueva.
+
+Por defecto es un LRU en memoria del proceso. Con TRANSACTION_CACHE_REDIS
+las entradas viven en Redis y las comparten todos los procesos de la API
+(cada proceso la actualiza con los eventos que publica).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+from ..schemas import TransactionResponse
+
+CACHE_TTL = int(os.getenv("TRANSACTION_CACHE_TTL_SECONDS", "30"))
+CACHE_SIZE = int(os.getenv("TRANSACTION_CACHE_SIZE", "10000"))
+CACHE_REDIS = os.getenv("TRANSACTION_CACHE_REDIS", "false").lower() in ("1", "true", "yes")
+
+
+# Guarda la entrada salvo que la existente tenga una versión mayor
+_PUT_SCRIPT = """
+local current = redis.call("GET", KEYS[1])
+if current then
+    local ok, entry = pcall(cjson.decode, current)
+    if ok and tonumber(entry["version"] or 0) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[3])
+return 1
+"""
+
+
+def entry_version(body: dict) -> float:
+    """Marca de tiempo del último cambio de la transacción"""
+    changed = datetime.fromisoformat(body["updated_at"] or body["created_at"])
+    if changed.tzinfo is None:
+        # SQLite no guarda la zona horaria; los valores se escriben en UTC
+        changed = changed.replace(tzinfo=timezone.utc)
+    return changed.timestamp()
+
+
+def make_entry(data) -> dict:
+    """Respuesta normalizada (JSON), su ETag y su versión, a partir de un modelo o un dict"""
+    body = TransactionResponse.model_validate(data).model_dump(mode="json")
+    digest = hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+    return {"body": body, "etag": f'W/"{digest[:20]}"', "version": entry_version(body)}
+
+
+class LocalTransactionCache:
+    def __init__(self, max_size: int = CACHE_SIZE, ttl: int = CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()  # id -> (expira, entrada)
+        self._lock = threading.Lock()
+
+    def get(self, transaction_id: int) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get(transaction_id)
+            if item is None:
+                return None
+            expires, entry = item
+            if expires <= time.monotonic():
+                del self._items[transaction_id]
+                return None
+            self._items.move_to_end(transaction_id)
+            return entry
+
+    def put(self, transaction_id: int, entry: dict) -> bool:
+        """Guarda la entrada; False si la que había es más nueva"""
+        with self._lock:
+            item = self._items.get(transaction_id)
+            if item is not None and item[0] > time.monotonic() and item[1]["version"] > entry["version"]:
+                return False
+            self._items[transaction_id] = (time.monotonic() + self.ttl, entry)
+            self._items.move_to_end(transaction_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+            return True
+
+    def invalidate(self, transaction_id: int):
+        with self._lock:
+            self._items.pop(transaction_id, None)
+
+
+class RedisTransactionCache:
+    def __init__(self, redis_url: str, ttl: int = CACHE_TTL, prefix: str = "transaction:"):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self._put = self.client.register_script(_PUT_SCRIPT)
+
+    def get(self, transaction_id: int) -> Optional[dict]:
+        raw = self.client.get(f"{self.prefix}{transaction_id}")
+        return json.loads(raw) if raw else None
+
+    def put(self, transaction_id: int, entry: dict) -> bool:
+        """Guarda la entrada; False si la que había es más nueva (comparación atómica en Lua)"""
+        return bool(self._put(
+            keys=[f"{self.prefix}{transaction_id}"],
+            args=[json.dumps(entry), repr(entry["version"]), self.ttl]
+        ))
+
+    def invalidate(self, transaction_id: int):
+        self.client.delete(f"{self.prefix}{transaction_id}")
+
+
+def _create_cache():
+    if CACHE_REDIS:
+        return RedisTransactionCache(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return LocalTransactionCache()
+
+
+transaction_cache = _create_cache()
+
+
+def cache_transaction(data) -> dict:
+    """
+    Guarda el estado de una transacción (modelo o dict) y retorna la entrada.
+    Si la caché ya tiene una versión más nueva, la conserva.
+    """
+    entry = make_entry(data)
+    transaction_cache.put(entry["body"]["id"], entry)
+    return entry
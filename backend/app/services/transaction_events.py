@@ -0,0 +1,86 @@
+"""
+Registro de cambios de transacciones (transaction_events), solo de inserción.
+
+Cada creación y cada cambio de estado agrega un evento con una copia de la
+fila, en la misma transacción de BD que el cambio: si el cambio se deshace,
+el evento también. GET /transactions/changes?since=<cursor> lee los eventos
+posteriores al cursor por clave primaria, así que un consumidor (réplica,
+analítica) se sincroniza por incrementos sin recorrer la tabla transactions.
+
+El cursor es el id del evento. Para que un consumidor nunca se salte un
+evento, los ids deben confirmarse en orden: SQLite ya serializa las
+escrituras y en PostgreSQL se toma un advisory lock justo antes del INSERT,
+que se libera con el commit (el id se asigna con el lock tomado).
+"""
+from typing import List, Optional
+from sqlalchemy import func, insert, literal, null, select
+from sqlalchemy.orm import Session
+from ..models import Transaction, TransactionEvent, TransactionStatus
+
+EVENT_CREATED = "created"
+EVENT_STATE_CHANGED = "state_changed"
+EVENT_SNAPSHOT = "snapshot"
+
+# Clave arbitraria del advisory lock de transaction_events
+EVENTS_LOCK_ID = 460046
+
+
+def setup_transaction_events(engine):
+    """
+    Si el registro está vacío, agrega un evento snapshot por cada transacción
+    existente: un consumidor que empieza en since=0 ve todas las filas.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Varios procesos de la API arrancan a la vez: con el lock, solo el
+            # primero ve el registro vacío y agrega los snapshots
+            conn.execute(select(func.pg_advisory_xact_lock(EVENTS_LOCK_ID)))
+        if conn.execute(select(TransactionEvent.id).limit(1)).first() is not None:
+            return
+        rows = select(
+            Transaction.id,
+            literal(EVENT_SNAPSHOT),
+            null(),
+            func.coalesce(Transaction.estado, TransactionStatus.PENDIENTE.value),
+            Transaction.user_id,
+            Transaction.monto,
+            Transaction.tipo,
+            func.coalesce(Transaction.updated_at, Transaction.created_at, func.now())
+        ).order_by(Transaction.id)
+        result = conn.execute(insert(TransactionEvent).from_select(
+            ["transaction_id", "event_type", "previous_estado", "estado",
+             "user_id", "monto", "tipo", "occurred_at"],
+            rows
+        ))
+    if result.rowcount:
+        print(f"📜 Eventos iniciales de transacciones: {result.rowcount}")
+
+
+def record_event(
+    db: Session,
+    transaction: Transaction,
+    event_type: str,
+    previous_estado: Optional[str] = None
+):
+    """Agrega el evento a la transacción de BD en curso; lo confirma el commit del llamador"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(EVENTS_LOCK_ID)))
+    db.execute(insert(TransactionEvent).values(
+        transaction_id=transaction.id,
+        event_type=event_type,
+        previous_estado=previous_estado,
+        estado=transaction.estado,
+        user_id=transaction.user_id,
+        monto=transaction.monto,
+        tipo=transaction.tipo
+    ))
+
+
+def changes_since(db: Session, since: int, limit: int) -> List[TransactionEvent]:
+    """Eventos con id > since, en orden"""
+    return db.scalars(
+        select(TransactionEvent)
+        .where(TransactionEvent.id > since)
+        .order_by(TransactionEvent.id)
+        .limit(limit)
+    ).all()
@@ -0,0 +1,102 @@
+"""
+Marcas en vuelo de transacciones encoladas en Celery.
+
+Antes de publicar la tarea se toma `transaction:inflight:<id>` en Redis con
+SET NX: si ya existe, la transacción está encolada o en proceso y no se
+vuelve a encolar (cada duplicado ocupaba un worker 2-5 s). El valor es el
+task_id, así que el duplicado recibe el de la tarea existente. El worker
+libera la marca al terminar, solo si sigue siendo la suya.
+
+La vigencia sigue a la tarea: mientras espera en cola la marca dura
+INFLIGHT_QUEUED_TTL (con miles de tareas en cola la espera supera con
+facilidad los minutos); al empezar, el worker la acorta a INFLIGHT_TTL, que
+la libera si el worker muere sin terminar la tarea. Si aun así una marca
+expira, el worker descarta la tarea duplicada (ver tasks.py).
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INFLIGHT_TTL = int(os.getenv("TRANSACTION_INFLIGHT_TTL_SECONDS", "900"))
+INFLIGHT_QUEUED_TTL = int(os.getenv("TRANSACTION_INFLIGHT_QUEUED_TTL_SECONDS", str(24 * 3600)))
+# Reintentos de SET NX para marcas liberadas entre SET y MGET
+ACQUIRE_ATTEMPTS = 3
+
+# Borra la marca solo si sigue siendo de la tarea (pudo expirar y tomarla otra)
+_RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Acorta la vigencia solo si la marca sigue siendo de la tarea
+_START_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class InFlightRegistry:
+    def __init__(
+        self,
+        redis_url: str,
+        ttl: int = INFLIGHT_TTL,
+        queued_ttl: int = INFLIGHT_QUEUED_TTL,
+        prefix: str = "transaction:inflight:"
+    ):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.ttl = ttl
+        self.queued_ttl = queued_ttl
+        self.prefix = prefix
+        self._release = self.client.register_script(_RELEASE_SCRIPT)
+        self._start = self.client.register_script(_START_SCRIPT)
+
+    def _key(self, transaction_id: int) -> str:
+        return f"{self.prefix}{transaction_id}"
+
+    def acquire_many(self, task_ids: Dict[int, str]) -> Tuple[List[int], Dict[int, Optional[str]]]:
+        """
+        Toma las marcas de {transaction_id: task_id} (un round-trip por intento).
+        Retorna (ids tomados, {id ya en vuelo: task_id de la tarea existente}).
+        Un id que no está en ninguno de los dos no se pudo resolver.
+        """
+        acquired = []
+        owners = {}
+        pending = list(task_ids)
+        for _ in range(ACQUIRE_ATTEMPTS):
+            pipe = self.client.pipeline(transaction=False)
+            for transaction_id in pending:
+                pipe.set(self._key(transaction_id), task_ids[transaction_id], nx=True, ex=self.queued_ttl)
+            results = pipe.execute()
+
+            acquired += [transaction_id for transaction_id, ok in zip(pending, results) if ok]
+            taken = [transaction_id for transaction_id, ok in zip(pending, results) if not ok]
+            if not taken:
+                break
+            current = self.client.mget([self._key(transaction_id) for transaction_id in taken])
+            owners.update((transaction_id, owner) for transaction_id, owner in zip(taken, current) if owner)
+            # Sin dueño: la marca se liberó entre SET y MGET (la tarea ya terminó); se vuelve a tomar
+            pending = [transaction_id for transaction_id, owner in zip(taken, current) if not owner]
+            if not pending:
+                break
+        return acquired, owners
+
+    def started(self, transaction_id: int, task_id: str):
+        """La tarea empezó: la marca pasa a la vigencia de una ejecución"""
+        self._start(keys=[self._key(transaction_id)], args=[task_id, self.ttl])
+
+    def release(self, transaction_id: int, task_id: str):
+        self._release(keys=[self._key(transaction_id)], args=[task_id])
+
+    def forget(self, transaction_ids: Iterable[int]):
+        """Borra marcas tomadas por una publicación que falló"""
+        keys: List[str] = [self._key(transaction_id) for transaction_id in transaction_ids]
+        if keys:
+            self.client.delete(*keys)
+
+
+inflight_registry = InFlightRegistry(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
@@ -0,0 +1,284 @@
+"""
+Creación idempotente de transacciones con claves de vigencia limitada.
+
+Cada clave vive en idempotency_records junto con el hash de la petición y la
+transacción que creó, hasta `expires_at`:
+
+- Claves enviadas por el cliente (header o body): IDEMPOTENCY_TTL_SECONDS.
+- Claves generadas a partir del contenido: IDEMPOTENCY_AUTO_TTL_SECONDS,
+  más corto, para que un depósito idéntico legítimo días después no se
+  descarte como duplicado.
+
+Mientras la clave está vigente, un reintento recibe esa transacción con su
+estado actual (como antes de existir el registro); la misma clave con otro
+contenido es un error (IdempotencyKeyReused). Al
+expirar, la clave se puede volver a usar y el sweeper la borra por lotes,
+así que el índice solo contiene las claves vigentes.
+
+En SQLite y PostgreSQL la creación es, en una sola transacción:
+    INSERT INTO transactions ... RETURNING ...
+    INSERT INTO idempotency_records ... ON CONFLICT (key)
+        DO UPDATE ... WHERE idempotency_records.expires_at <= now RETURNING key
+Si el registro no vuelve, la clave está vigente en otra petición: se deshace
+la transacción y se responde con el registro existente. Si ese registro
+expira o el sweeper lo borra antes de releerlo, se reintenta una vez; si
+vuelve a ocurrir, IdempotencyConflict (409). Si se crea, el evento `created`
+de transaction_events se confirma en el mismo commit.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from sqlalchemy import delete, inspect, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models import IdempotencyRecord, Transaction
+from ..schemas import TransactionResponse
+from .transaction_events import EVENT_CREATED, record_event
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_AUTO_TTL = int(os.getenv("IDEMPOTENCY_AUTO_TTL_SECONDS", "600"))
+SWEEP_BATCH_SIZE = int(os.getenv("IDEMPOTENCY_SWEEP_BATCH_SIZE", "1000"))
+
+# INSERT con soporte de ON CONFLICT por dialecto
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+class IdempotencyKeyReused(Exception):
+    """La clave está vigente para una petición con otro contenido"""
+
+
+class IdempotencyConflict(Exception):
+    """La clave cambió de dueño mientras se creaba la transacción; el cliente puede reintentar"""
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def setup_idempotency_store(engine):
+    """
+    Quita el índice único heredado de transactions.idempotency_key: con claves
+    que expiran, la misma clave puede repetirse en transacciones distintas.
+    Antes copia a idempotency_records las claves que seguirían vigentes, para
+    que un reintento durante el despliegue no cree un duplicado.
+
+    También quita la columna response de versiones anteriores: un reintento
+    responde con el estado actual de la transacción, no con una copia.
+    """
+    inspector = inspect(engine)
+    if "response" in [column["name"] for column in inspector.get_columns("idempotency_records")]:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE idempotency_records DROP COLUMN response"))
+        print("🔑 Columna idempotency_records.response eliminada")
+
+    for index in inspector.get_indexes("transactions"):
+        if index["column_names"] == ["idempotency_key"]:
+            with engine.begin() as conn:
+                copied = _backfill_records(conn)
+                conn.execute(text(f"DROP INDEX {index['name']}"))
+            print(f"🔑 Índice {index['name']} reemplazado por idempotency_records ({copied} claves copiadas)")
+
+
+def request_hash_of(values: dict) -> str:
+    """Hash del contenido (user_id, monto, tipo); el mismo que generate_idempotency_key"""
+    content = json.dumps({name: values[name] for name in ("user_id", "monto", "tipo")}, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _backfill_records(conn) -> int:
+    """Registros para las transacciones con clave creadas dentro de la ventana"""
+    now = utcnow()
+    existing = select(IdempotencyRecord.key)
+    rows = conn.execute(
+        select(Transaction).where(
+            Transaction.idempotency_key.is_not(None),
+            Transaction.idempotency_key.not_in(existing),
+            Transaction.created_at > now - timedelta(seconds=max(IDEMPOTENCY_TTL, IDEMPOTENCY_AUTO_TTL))
+        )
+    ).all()
+
+    records = []
+    for row in rows:
+        created_at = row.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        request_hash = request_hash_of(row._mapping)
+        # Las claves automáticas son el hash del contenido
+        ttl = IDEMPOTENCY_AUTO_TTL if row.idempotency_key == request_hash else IDEMPOTENCY_TTL
+        if created_at + timedelta(seconds=ttl) <= now:
+            continue
+        records.append({
+            "key": row.idempotency_key,
+            "request_hash": request_hash,
+            "transaction_id": row.id,
+            "created_at": created_at,
+            "expires_at": created_at + timedelta(seconds=ttl),
+        })
+
+    if records:
+        insert = _UPSERT_INSERTS.get(conn.dialect.name)
+        if insert is not None:
+            # Otro proceso de la API pudo copiarlas al mismo tiempo
+            conn.execute(insert(IdempotencyRecord).on_conflict_do_nothing(), records)
+        else:
+            conn.execute(IdempotencyRecord.__table__.insert(), records)
+    return len(records)
+
+
+def get_record(db: Session, key: str) -> Optional[IdempotencyRecord]:
+    """Registro vigente de la clave, si existe"""
+    return db.scalars(
+        select(IdempotencyRecord).where(
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.expires_at > utcnow()
+        )
+    ).first()
+
+
+def replay(record: dict, request_hash: str) -> int:
+    """ID de la transacción de un registro ({request_hash, transaction_id, ...})"""
+    if record["request_hash"] != request_hash:
+        raise IdempotencyKeyReused("La clave de idempotencia ya se usó con otro contenido")
+    return record["transaction_id"]
+
+
+def record_as_dict(record: IdempotencyRecord) -> dict:
+    expires_at = record.expires_at
+    if expires_at.tzinfo is None:
+        # SQLite no guarda la zona horaria; los valores se escriben en UTC
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return {
+        "request_hash": record.request_hash,
+        "transaction_id": record.transaction_id,
+        "expires_at": expires_at
+    }
+
+
+def create_transaction_once(
+    db: Session,
+    values: dict,
+    key: str,
+    request_hash: str,
+    ttl: int = IDEMPOTENCY_TTL
+) -> Tuple[dict, bool]:
+    """
+    Crea la transacción si la clave no está vigente.
+    Retorna (registro, creada); si se creó, el registro trae su respuesta.
+    """
+    insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        return _create_checked(db, values, key, request_hash, ttl)
+
+    for _ in range(2):
+        record = _try_create(db, insert, values, key, request_hash, ttl)
+        if record is not None:
+            return record, True
+
+        # Clave vigente: ON CONFLICT esperó a que la otra petición confirmara
+        db.rollback()
+        existing = get_record(db, key)
+        if existing is not None:
+            return record_as_dict(existing), False
+        # Expiró o el sweeper la borró entre el upsert y la lectura: se reintenta
+
+    raise IdempotencyConflict("La clave de idempotencia cambió durante la creación; reintente")
+
+
+def _try_create(db: Session, insert, values: dict, key: str, request_hash: str, ttl: int) -> Optional[dict]:
+    """Un intento de creación; None si la clave está vigente en otra petición"""
+    now = utcnow()
+    transaction = db.scalars(
+        insert(Transaction).values(**values, idempotency_key=key).returning(Transaction)
+    ).one()
+
+    stmt = insert(IdempotencyRecord).values(
+        key=key,
+        request_hash=request_hash,
+        transaction_id=transaction.id,
+        created_at=now,
+        expires_at=now + timedelta(seconds=ttl)
+    )
+    # Solo se reemplaza un registro expirado (que el sweeper aún no borró)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyRecord.key],
+        set_={
+            "request_hash": stmt.excluded.request_hash,
+            "transaction_id": stmt.excluded.transaction_id,
+            "created_at": stmt.excluded.created_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=IdempotencyRecord.expires_at <= now
+    ).returning(IdempotencyRecord.key)
+
+    if db.execute(stmt).first() is None:
+        return None
+
+    record_event(db, transaction, EVENT_CREATED)
+    response = TransactionResponse.model_validate(transaction).model_dump(mode="json")
+    # Los valores ya vienen del RETURNING: se desvincula para que el commit no los expire
+    db.expunge(transaction)
+    db.commit()
+    return {
+        "request_hash": request_hash,
+        "transaction_id": transaction.id,
+        "response": response,
+        "expires_at": now + timedelta(seconds=ttl)
+    }
+
+
+def _create_checked(db: Session, values: dict, key: str, request_hash: str, ttl: int) -> Tuple[dict, bool]:
+    """Otros dialectos: lectura previa, resolviendo la carrera con la clave primaria"""
+    existing = get_record(db, key)
+    if existing is not None:
+        return record_as_dict(existing), False
+
+    now = utcnow()
+    try:
+        db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key == key))
+        transaction = Transaction(**values, idempotency_key=key)
+        db.add(transaction)
+        db.flush()
+        response = TransactionResponse.model_validate(transaction).model_dump(mode="json")
+        db.add(IdempotencyRecord(
+            key=key,
+            request_hash=request_hash,
+            transaction_id=transaction.id,
+            created_at=now,
+            expires_at=now + timedelta(seconds=ttl)
+        ))
+        record_event(db, transaction, EVENT_CREATED)
+        db.commit()
+        return {
+            "request_hash": request_hash,
+            "transaction_id": response["id"],
+            "response": response,
+            "expires_at": now + timedelta(seconds=ttl)
+        }, True
+    except IntegrityError:
+        db.rollback()
+        existing = get_record(db, key)
+        if existing is None:
+            raise
+        return record_as_dict(existing), False
+
+
+def sweep_expired(db: Session, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+    """Borra las claves expiradas en lotes cortos (una transacción por lote)"""
+    deleted = 0
+    while True:
+        expired = select(IdempotencyRecord.key).where(
+            IdempotencyRecord.expires_at <= utcnow()
+        ).limit(batch_size)
+        result = db.execute(
+            delete(IdempotencyRecord).where(IdempotencyRecord.key.in_(expired.scalar_subquery()))
+        )
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
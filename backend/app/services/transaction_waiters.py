@@ -0,0 +1,56 @@
+"""
+Esperas de long-poll sobre transacciones (GET /transactions/{id}/wait).
+
+Cada petición en espera es un Future en el event loop, registrado por ID de
+transacción. No hay polling a la BD por waiter: el mismo evento que actualiza
+la caché y notifica a los WebSockets (notification_relay.py) resuelve todos
+los Futures de esa transacción. Un waiter inactivo solo ocupa su Future y la
+conexión abierta.
+
+Cada proceso de la API publica todos los eventos a sus propios waiters. Al
+agotar el timeout el endpoint vuelve a leer el estado de la BD.
+"""
+import asyncio
+from typing import Dict, Optional, Set
+from ..models import TransactionStatus
+
+TERMINAL_STATES = {TransactionStatus.PROCESADO.value, TransactionStatus.FALLIDO.value}
+
+
+def is_terminal(body: dict) -> bool:
+    return body["estado"] in TERMINAL_STATES
+
+
+class TransactionWaiters:
+    def __init__(self):
+        self._waiters: Dict[int, Set[asyncio.Future]] = {}
+
+    async def wait(self, transaction_id: int, timeout: float) -> Optional[dict]:
+        """Espera la próxima notificación de la transacción; None si vence el timeout"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(transaction_id, set()).add(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(transaction_id)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[transaction_id]
+
+    def notify(self, transaction_id: int, entry: dict) -> int:
+        """Despierta a los waiters de la transacción con la nueva entrada; retorna cuántos"""
+        woken = 0
+        for future in self._waiters.pop(transaction_id, ()):
+            if not future.done():
+                future.set_result(entry)
+                woken += 1
+        return woken
+
+    def count(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+
+transaction_waiters = TransactionWaiters()
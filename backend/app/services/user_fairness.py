@@ -0,0 +1,96 @@
+"""
+Reparto justo de los workers entre usuarios.
+
+Cada usuario tiene un token bucket en Redis (USER_RATE tareas/s, ráfaga de
+USER_BURST). Mientras tiene tokens, sus transacciones van a la cola que les
+corresponde por prioridad (alta, normal o baja); el excedente, de cualquier
+clase, va a transactions.overflow, que el worker consume después de las
+demás. Así un usuario que encola 50k transacciones ocupa las colas normales
+con a lo sumo su ráfaga más USER_RATE por segundo, y el resto de los
+usuarios espera detrás de esa parte acotada y no de todo su backlog.
+
+El bucket se actualiza con un script Lua (atómico entre procesos de la API)
+y una llamada toma de una vez los tokens de todas las transacciones del
+usuario en un encolado masivo.
+"""
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from ..celery_app import QUEUE_OVERFLOW, route_transaction
+
+USER_RATE = float(os.getenv("TRANSACTION_USER_RATE", "5"))
+USER_BURST = int(os.getenv("TRANSACTION_USER_BURST", "50"))
+
+# Recarga el bucket según el tiempo transcurrido y toma hasta ARGV[4] tokens
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4])
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(requested, math.floor(tokens))
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens - granted), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return granted
+"""
+
+
+class UserTokenBuckets:
+    def __init__(
+        self,
+        redis_url: str,
+        rate: float = USER_RATE,
+        burst: int = USER_BURST,
+        prefix: str = "transaction:bucket:"
+    ):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    def take_many(self, requested: Dict[str, int]) -> Dict[str, int]:
+        """Toma tokens para {user_id: cantidad} en un round-trip; retorna los concedidos"""
+        users = list(requested)
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in users:
+            self._take(
+                keys=[f"{self.prefix}{user_id}"],
+                args=[self.rate, self.burst, now, requested[user_id]],
+                client=pipe
+            )
+        return dict(zip(users, (int(granted) for granted in pipe.execute())))
+
+
+user_buckets = UserTokenBuckets(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+
+
+def plan_queues(rows: List[Tuple[int, str, str, float]], priority: Optional[str] = None) -> Dict[int, Tuple[str, bool]]:
+    """
+    Cola de cada transacción (id, user_id, tipo, monto), en el orden dado.
+    Retorna {id: (cola, limitada)}; limitada si el usuario superó su cuota.
+    """
+    plan = {}
+    by_user = defaultdict(list)
+    for transaction_id, user_id, tipo, monto in rows:
+        by_user[user_id].append((transaction_id, route_transaction(tipo, monto, priority)))
+
+    if not by_user:
+        return plan
+
+    granted = user_buckets.take_many({user_id: len(user_rows) for user_id, user_rows in by_user.items()})
+
+    for user_id, user_rows in by_user.items():
+        for index, (transaction_id, queue) in enumerate(user_rows):
+            if index < granted[user_id]:
+                plan[transaction_id] = (queue, False)
+            else:
+                plan[transaction_id] = (QUEUE_OVERFLOW, True)
+    return plan
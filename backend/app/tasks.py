@@ -1,45 +1,58 @@
 from .celery_app import celery_app
 from .database import SessionLocal
 from .models import Transaction, TransactionStatus
+from .services.transaction_events import EVENT_STATE_CHANGED, record_event
+from .services.transaction_inflight import inflight_registry
 import time
 import random
 import asyncio
-import requests
-import os
+
+# Estados que una tarea puede procesar; procesado es final
+PROCESSABLE_STATES = {TransactionStatus.PENDIENTE.value, TransactionStatus.FALLIDO.value}
+
 
 @celery_app.task(bind=True, name="process_transaction")
 def process_transaction(self, transaction_id: int):
     """
     Procesa una transacción de forma asíncrona.
     Simula procesamiento con sleep y puede fallar aleatoriamente.
+    Una tarea duplicada de una transacción ya procesada no hace nada.
     """
+    # Ya cargado por el worker (worker_init); importarlo arriba lo cargaría en la API
+    from .worker_metrics import task_phase
+
     db = SessionLocal()
+    transaction = None
+    
+    try:
+        inflight_registry.started(transaction_id, self.request.id)
+    except Exception as e:
+        print(f"Error actualizando la marca en vuelo: {e}")
     
     try:
         # Obtener la transacción
-        transaction = db.query(Transaction).filter(
-            Transaction.id == transaction_id
-        ).first()
+        with task_phase(self.name, "load"):
+            transaction = db.query(Transaction).filter(
+                Transaction.id == transaction_id
+            ).first()
         
         if not transaction:
             return {"status": "error", "message": "Transacción no encontrada"}
         
-        # Actualizar estado a procesando (ya está en PENDIENTE por defecto)
-        # Notificar inicio de procesamiento
-        _notify_transaction_change(transaction)
+        if transaction.estado not in PROCESSABLE_STATES:
+            return _skipped(transaction_id)
         
         # Simular procesamiento (2-5 segundos)
         processing_time = random.uniform(2, 5)
-        time.sleep(processing_time)
+        with task_phase(self.name, "work"):
+            time.sleep(processing_time)
         
         # Simular posible fallo (10% de probabilidad)
         if random.random() < 0.1:
-            transaction.estado = TransactionStatus.FALLIDO.value
-            db.commit()
-            db.refresh(transaction)
-            
-            # Notificar fallo
-            _notify_transaction_change(transaction)
+            with task_phase(self.name, "commit"):
+                if not _set_estado(db, transaction, TransactionStatus.FALLIDO.value):
+                    return _skipped(transaction_id)
+                db.commit()
             
             return {
                 "status": "failed",
@@ -48,12 +61,10 @@ def process_transaction(self, transaction_id: int):
             }
         
         # Procesamiento exitoso
-        transaction.estado = TransactionStatus.PROCESADO.value
-        db.commit()
-        db.refresh(transaction)
-        
-        # Notificar éxito
-        _notify_transaction_change(transaction)
+        with task_phase(self.name, "commit"):
+            if not _set_estado(db, transaction, TransactionStatus.PROCESADO.value):
+                return _skipped(transaction_id)
+            db.commit()
         
         return {
             "status": "success",
@@ -64,8 +75,11 @@ def process_transaction(self, transaction_id: int):
     except Exception as e:
         # En caso de error, marcar como fallido
         if transaction:
-            transaction.estado = TransactionStatus.FALLIDO.value
-            db.commit()
+            db.rollback()
+            if _set_estado(db, transaction, TransactionStatus.FALLIDO.value):
+                db.commit()
+            else:
+                db.rollback()
         
         return {
             "status": "error",
@@ -75,34 +89,35 @@ def process_transaction(self, transaction_id: int):
     
     finally:
         db.close()
+        # La transacción se puede volver a encolar
+        try:
+            inflight_registry.release(transaction_id, self.request.id)
+        except Exception as e:
+            print(f"Error liberando la marca en vuelo: {e}")
+
 
+def _skipped(transaction_id: int) -> dict:
+    return {
+        "status": "skipped",
+        "transaction_id": transaction_id,
+        "message": "La transacción ya fue procesada por otra tarea"
+    }
 
-def _notify_transaction_change(transaction: Transaction):
+
+def _set_estado(db, transaction: Transaction, estado: str) -> bool:
     """
-    Notifica cambios en una transacción mediante HTTP POST al endpoint interno.
-    Esto permite que el WebSocket manager reciba las actualizaciones.
+    Cambia el estado y registra el evento; ambos se confirman en el mismo commit.
+    El relay de la API publica el evento (ver services/notification_relay.py).
+    Relee la fila con lock (FOR UPDATE en PostgreSQL): si otra tarea ya la
+    procesó no la toca y retorna False, y el llamador no confirma.
     """
-    try:
-        # URL del servidor (ajustar según configuración)
-        api_url = os.getenv("API_URL", "http://localhost:8000")
-        
-        # Preparar datos de la transacción
-        transaction_data = {
-            "id": transaction.id,
-            "user_id": transaction.user_id,
-            "monto": transaction.monto,
-            "tipo": transaction.tipo,
-            "estado": transaction.estado,
-            "created_at": transaction.created_at.isoformat() if transaction.created_at else None,
-            "updated_at": transaction.updated_at.isoformat() if transaction.updated_at else None
-        }
-        
-        # Enviar notificación al endpoint interno (no bloqueante)
-        requests.post(
-            f"{api_url}/internal/notify-transaction",
-            json=transaction_data,
-            timeout=1
-        )
-    except Exception as e:
-        # No fallar el procesamiento si la notificación falla
-        print(f"Error notificando cambio de transacción: {e}")
+    db.refresh(transaction, with_for_update=True)
+    previous_estado = transaction.estado
+    if previous_estado not in PROCESSABLE_STATES:
+        return False
+    if previous_estado == estado:
+        return True
+    transaction.estado = estado
+    db.flush()
+    record_event(db, transaction, EVENT_STATE_CHANGED, previous_estado)
+    return True
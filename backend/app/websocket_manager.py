@@ -2,6 +2,8 @@ from fastapi import WebSocket
 from typing import List, Dict
 import json
 import asyncio
+import time
+from .metrics import WS_BROADCAST_LATENCY, WS_CONNECTIONS, WS_FANOUT, WS_MESSAGES, WS_USERS
 
 class ConnectionManager:
     """Gestor de conexiones WebSocket para notificaciones en tiempo real"""
@@ -19,6 +21,8 @@ class ConnectionManager:
             if user_id not in self.user_connections:
                 self.user_connections[user_id] = []
             self.user_connections[user_id].append(websocket)
+        
+        self._update_gauges()
     
     def disconnect(self, websocket: WebSocket, user_id: str = None):
         """Remueve una conexión WebSocket"""
@@ -30,23 +34,36 @@ class ConnectionManager:
                 self.user_connections[user_id].remove(websocket)
             if not self.user_connections[user_id]:
                 del self.user_connections[user_id]
+        
+        self._update_gauges()
+    
+    def _update_gauges(self):
+        WS_CONNECTIONS.set(len(self.active_connections))
+        WS_USERS.set(len(self.user_connections))
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Envía un mensaje a una conexión específica"""
         try:
             await websocket.send_json(message)
+            WS_MESSAGES.labels("personal", "ok").inc()
         except Exception as e:
+            WS_MESSAGES.labels("personal", "error").inc()
             print(f"Error enviando mensaje personal: {e}")
     
     async def broadcast(self, message: dict):
         """Envía un mensaje a todas las conexiones activas"""
+        started = time.perf_counter()
+        WS_FANOUT.labels("broadcast").observe(len(self.active_connections))
         disconnected = []
         for connection in self.active_connections:
             try:
                 await connection.send_json(message)
+                WS_MESSAGES.labels("broadcast", "ok").inc()
             except Exception as e:
                 print(f"Error en broadcast: {e}")
+                WS_MESSAGES.labels("broadcast", "error").inc()
                 disconnected.append(connection)
+        WS_BROADCAST_LATENCY.labels("broadcast").observe(time.perf_counter() - started)
         
         # Limpiar conexiones muertas
         for conn in disconnected:
@@ -55,13 +72,18 @@ class ConnectionManager:
     async def broadcast_to_user(self, user_id: str, message: dict):
         """Envía un mensaje a todas las conexiones de un usuario específico"""
         if user_id in self.user_connections:
+            started = time.perf_counter()
+            WS_FANOUT.labels("user").observe(len(self.user_connections[user_id]))
             disconnected = []
             for connection in self.user_connections[user_id]:
                 try:
                     await connection.send_json(message)
+                    WS_MESSAGES.labels("user", "ok").inc()
                 except Exception as e:
                     print(f"Error enviando a usuario {user_id}: {e}")
+                    WS_MESSAGES.labels("user", "error").inc()
                     disconnected.append(connection)
+            WS_BROADCAST_LATENCY.labels("user").observe(time.perf_counter() - started)
             
             # Limpiar conexiones muertas
             for conn in disconnected:
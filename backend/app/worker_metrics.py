@@ -0,0 +1,158 @@
+"""
+Telemetría de tareas Celery.
+
+- Espera en cola: el productor marca cada mensaje con `enqueued_at`
+  (celery_app.py) y el worker mide cuánto tardó en empezar a ejecutarlo.
+- Duración total y resultado de cada tarea (success / failed / error de la
+  tarea, o exception si lanzó).
+- Duración por fase dentro de la tarea (`task_phase`).
+- Longitud de las colas del broker, leída en cada scrape.
+- Últimas duraciones de tareas en Redis, compartidas entre workers: las
+  usa el autoscaler (ver autoscaler.py).
+
+Solo lo importa el worker (señal worker_init en celery_app.py), que expone
+las métricas en http://<host>:CELERY_METRICS_PORT/metrics.
+Con el pool prefork hay que definir PROMETHEUS_MULTIPROC_DIR (ver
+start_worker.sh) para agregar los procesos hijos.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+from celery.signals import task_failure, task_postrun, task_prerun, worker_process_shutdown
+from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess, start_http_server
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+
+METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "9808"))
+
+QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds", "Tiempo desde que se encola hasta que un worker la inicia", ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds", "Duración de la tarea en el worker", ["task"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 3, 4, 5, 7.5, 10, 30, 60)
+)
+TASK_PHASE = Histogram(
+    "celery_task_phase_seconds", "Duración por fase de la tarea", ["task", "phase"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+)
+TASK_OUTCOMES = Counter(
+    "celery_tasks_total", "Tareas ejecutadas por resultado", ["task", "outcome"]
+)
+
+_started = {}  # task_id -> perf_counter al iniciar
+
+
+class RecentDurations:
+    """Últimas duraciones de tareas en una lista de Redis"""
+
+    def __init__(self, redis_url: str, key: str = "celery:task_durations", samples: int = 200):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.key = key
+        self.samples = samples
+
+    def record(self, seconds: float):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.lpush(self.key, seconds)
+        pipe.ltrim(self.key, 0, self.samples - 1)
+        pipe.execute()
+
+    def mean(self) -> Optional[float]:
+        values = [float(value) for value in self.client.lrange(self.key, 0, -1)]
+        return sum(values) / len(values) if values else None
+
+
+recent_durations = RecentDurations(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+
+
+def queue_depths(app, queues: Iterable[str]) -> Dict[str, int]:
+    """Mensajes esperando en cada cola del broker"""
+    depths = {}
+    with app.connection_for_read() as conn:
+        channel = conn.default_channel
+        for queue in sorted(queues):
+            # passive: no crea la cola; en Redis incluye las subcolas de prioridad
+            try:
+                depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+            except conn.channel_errors:
+                # Ningún worker la declaró todavía: está vacía
+                depths[queue] = 0
+    return depths
+
+
+@contextmanager
+def task_phase(task: str, phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        TASK_PHASE.labels(task, phase).observe(time.perf_counter() - started)
+
+
+@task_prerun.connect
+def _on_prerun(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.perf_counter()
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at:
+        QUEUE_WAIT.labels(task.name).observe(max(0.0, time.time() - enqueued_at))
+
+
+@task_postrun.connect
+def _on_postrun(task_id=None, task=None, retval=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        TASK_DURATION.labels(task.name).observe(elapsed)
+        try:
+            recent_durations.record(elapsed)
+        except Exception as e:
+            print(f"Error guardando la duración de la tarea: {e}")
+
+    # Las tareas reportan su resultado en el dict de retorno
+    if state == "SUCCESS":
+        outcome = retval.get("status", "success") if isinstance(retval, dict) else "success"
+        TASK_OUTCOMES.labels(task.name, outcome).inc()
+
+
+@task_failure.connect
+def _on_failure(sender=None, **kwargs):
+    TASK_OUTCOMES.labels(sender.name, "exception").inc()
+
+
+class QueueDepthCollector:
+    """Longitud de las colas del broker en el momento del scrape"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        gauge = GaugeMetricFamily("celery_queue_length", "Mensajes esperando en la cola", labels=["queue"])
+        queues = {self.app.conf.task_default_queue} | set(self.app.amqp.queues.keys())
+        try:
+            for queue, depth in queue_depths(self.app, queues).items():
+                gauge.add_metric([queue], depth)
+        except Exception as e:
+            print(f"Error leyendo la longitud de las colas: {e}")
+        yield gauge
+
+
+def start_exporter(app):
+    """Servidor de métricas del worker; en el proceso principal, antes de crear el pool"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    registry.register(QueueDepthCollector(app))
+    start_http_server(METRICS_PORT, registry=registry)
+    print(f"📈 Métricas del worker en http://0.0.0.0:{METRICS_PORT}/metrics")
+
+
+@worker_process_shutdown.connect
+def _mark_process_dead(pid=None, **kwargs):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -3,4 +3,23 @@
 
 echo "🔧 Iniciando Celery Worker..."
 echo "📦 Importando tareas desde app.tasks..."
-celery -A app.celery_app worker --loglevel=info -E
+
+# Métricas de los procesos del pool (agregadas en :${CELERY_METRICS_PORT:-9808}/metrics)
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/celery_metrics}
+# Se vacía en cada arranque: nunca borrar la raíz ni el directorio actual
+case "$PROMETHEUS_MULTIPROC_DIR" in
+    ""|/|//|.|./)
+        echo "❌ PROMETHEUS_MULTIPROC_DIR inválido: '$PROMETHEUS_MULTIPROC_DIR'" >&2
+        exit 1
+        ;;
+esac
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# Colas en orden de prioridad (alta, normal, baja, excedente por usuario);
+# "celery" drena mensajes encolados antes de que existieran las colas por prioridad
+QUEUES=${CELERY_QUEUES:-transactions.high,transactions.default,transactions.low,transactions.overflow,celery}
+
+# Pool entre MIN y MAX procesos según la latencia de cola (ver app/autoscaler.py)
+AUTOSCALE=${CELERY_MAX_CONCURRENCY:-8},${CELERY_MIN_CONCURRENCY:-1}
+
+celery -A app.celery_app worker --loglevel=info -E -Q "$QUEUES" --autoscale="$AUTOSCALE"
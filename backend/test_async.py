@@ -4,7 +4,6 @@ Ejecutar después de iniciar el servidor y el worker de Celery
 """
 import requests
 import json
-import time
 
 BASE_URL = "http://localhost:8000"
 
@@ -41,6 +40,15 @@ def get_transaction(transaction_id: int):
     response = requests.get(f"{BASE_URL}/transactions/{transaction_id}")
     return response.json()
 
+def wait_transaction(transaction_id: int, timeout: float = 30, until: str = "terminal"):
+    """Espera (long-poll) a que la transacción llegue a un estado final"""
+    response = requests.get(
+        f"{BASE_URL}/transactions/{transaction_id}/wait",
+        params={"timeout": timeout, "until": until},
+        timeout=timeout + 5
+    )
+    return response.json()
+
 def test_async_processing():
     """Prueba completa del procesamiento asíncrono"""
     print("=" * 60)
@@ -64,29 +72,17 @@ def test_async_processing():
     print(f"  Status: {async_response['status']}")
     print()
     
-    # Paso 3: Monitorear el estado
-    print("⏳ Paso 3: Monitoreando el procesamiento...")
-    max_attempts = 15
-    attempt = 0
+    # Paso 3: Esperar el resultado (long-poll, sin sleeps)
+    print("⏳ Paso 3: Esperando el procesamiento...")
+    current_state = wait_transaction(transaction_id, timeout=30)
+    estado = current_state['estado']
     
-    while attempt < max_attempts:
-        time.sleep(1)
-        attempt += 1
-        
-        current_state = get_transaction(transaction_id)
-        estado = current_state['estado']
-        
-        print(f"  [{attempt}] Estado: {estado}")
-        
-        if estado in ["procesado", "fallido"]:
-            print()
-            if estado == "procesado":
-                print("✅ Transacción procesada exitosamente!")
-            else:
-                print("❌ Transacción falló durante el procesamiento")
-            break
+    print()
+    if estado == "procesado":
+        print("✅ Transacción procesada exitosamente!")
+    elif estado == "fallido":
+        print("❌ Transacción falló durante el procesamiento")
     else:
-        print()
         print("⚠️  Timeout: La transacción sigue en procesamiento")
     
     print()
@@ -111,14 +107,13 @@ def test_multiple_async():
         print(f"  ✓ Transacción {tx['id']} encolada")
     
     print()
-    print("⏳ Esperando procesamiento (10 segundos)...")
-    time.sleep(10)
+    print("⏳ Esperando procesamiento...")
     print()
     
     # Verificar estados
     print("📊 Estados finales:")
     for tx_id in transactions:
-        state = get_transaction(tx_id)
+        state = wait_transaction(tx_id, timeout=15)
         print(f"  ID {tx_id}: {state['estado']}")
     
     print()
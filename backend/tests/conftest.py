@@ -0,0 +1,11 @@
+"""
+Fixtures de las pruebas del backend.
+
+Las pruebas no usan Redis ni el broker: los servicios que los necesitan se
+reemplazan por dobles en memoria.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
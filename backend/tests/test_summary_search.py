@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.models import Base, SummaryRequest
+from app.services import summary_search, text_storage
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_storage, "BLOB_STORAGE_ENABLED", True)
+    monkeypatch.setattr(text_storage, "BLOB_MIN_SIZE", 10)
+    monkeypatch.setattr(summary_search, "BACKFILL_BATCH_SIZE", 3)
+    engine = create_engine(f"sqlite:///{tmp_path / 'summaries.db'}")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as db:
+        for n in range(10):
+            # Textos repetidos: varios resultados con el mismo rank, desempatados por id
+            request = SummaryRequest(status="completed", summary=f"resumen {n}")
+            text_storage.attach_text(db, request, "texto sobre pingüinos " * (n % 3 + 1))
+            db.add(request)
+        db.add(SummaryRequest(status="completed", original_text="otro tema", summary="nada"))
+        db.commit()
+
+    summary_search.setup_search_index(engine)
+    return engine
+
+
+def test_backfill_indexes_blob_texts_in_batches(engine):
+    with engine.connect() as conn:
+        indexed = conn.execute(text("SELECT count(*) FROM summary_search")).scalar()
+        matches = conn.execute(text(
+            "SELECT count(*) FROM summary_search WHERE summary_search MATCH 'pinguinos'"
+        )).scalar()
+
+    assert indexed == 11
+    assert matches == 10
+
+
+def test_keyset_pages_match_single_query(engine):
+    with Session(engine) as db:
+        max_id = summary_search.latest_id(db)
+        expected = summary_search.search(db, "pingüinos", 100, max_id)
+
+        pages, after = [], None
+        while True:
+            hits = summary_search.search(db, "pingüinos", 3, max_id, after)
+            pages += hits
+            if len(hits) < 3:
+                break
+            last_id, last_rank = hits[-1]
+            after, cursor_max_id = summary_search.decode_cursor(
+                summary_search.encode_cursor(last_rank, last_id, max_id)
+            )
+            assert cursor_max_id == max_id
+
+    assert len(expected) == 10
+    assert pages == expected
+
+
+def test_invalid_cursor_rejected():
+    for cursor in ("3:4", "nan:1:2", "x:1:2"):
+        with pytest.raises(ValueError):
+            summary_search.decode_cursor(cursor)
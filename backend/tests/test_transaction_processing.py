@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import tasks
+from app.models import Base, Transaction, TransactionStatus
+from app.services.transaction_inflight import InFlightRegistry
+
+
+class StubInFlight:
+    def started(self, transaction_id, task_id):
+        pass
+
+    def release(self, transaction_id, task_id):
+        pass
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'transactions.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(tasks, "SessionLocal", factory)
+    monkeypatch.setattr(tasks, "inflight_registry", StubInFlight())
+    return factory
+
+
+def _create(factory, estado: str) -> int:
+    with factory() as db:
+        transaction = Transaction(user_id="u1", monto=10.0, tipo="deposito", estado=estado)
+        db.add(transaction)
+        db.commit()
+        return transaction.id
+
+
+def _estado(factory, transaction_id: int) -> str:
+    with factory() as db:
+        return db.get(Transaction, transaction_id).estado
+
+
+def test_duplicate_task_skips_processed_transaction(session_factory, monkeypatch):
+    transaction_id = _create(session_factory, TransactionStatus.PROCESADO.value)
+    monkeypatch.setattr(tasks.time, "sleep", lambda seconds: pytest.fail("no debería procesar"))
+
+    result = tasks.process_transaction.apply(args=(transaction_id,)).get()
+
+    assert result["status"] == "skipped"
+    assert _estado(session_factory, transaction_id) == TransactionStatus.PROCESADO.value
+
+
+def test_duplicate_task_does_not_flip_processed_to_failed(session_factory, monkeypatch):
+    transaction_id = _create(session_factory, TransactionStatus.PENDIENTE.value)
+
+    def other_task_finishes(seconds):
+        with session_factory() as db:
+            db.get(Transaction, transaction_id).estado = TransactionStatus.PROCESADO.value
+            db.commit()
+
+    monkeypatch.setattr(tasks.time, "sleep", other_task_finishes)
+    monkeypatch.setattr(tasks.random, "random", lambda: 0.0)  # Camino de fallo simulado
+
+    result = tasks.process_transaction.apply(args=(transaction_id,)).get()
+
+    assert result["status"] == "skipped"
+    assert _estado(session_factory, transaction_id) == TransactionStatus.PROCESADO.value
+
+
+def test_marker_released_between_set_and_mget_is_retaken():
+    fakeredis = pytest.importorskip("fakeredis")
+    registry = InFlightRegistry("redis://localhost:6379/0")
+    registry.client = fakeredis.FakeRedis(decode_responses=True)
+    registry.client.set(registry._key(1), "tarea-anterior")
+    registry.client.set(registry._key(2), "tarea-en-curso")
+
+    mget = registry.client.mget
+
+    def mget_after_release(keys):
+        # La tarea anterior termina justo después del SET NX
+        registry.client.delete(registry._key(1))
+        return mget(keys)
+
+    registry.client.mget = mget_after_release
+
+    acquired, owners = registry.acquire_many({1: "nueva", 2: "otra", 3: "libre"})
+
+    assert sorted(acquired) == [1, 3]
+    assert owners == {2: "tarea-en-curso"}
+    assert registry.client.get(registry._key(1)) == "nueva"
+    assert registry.client.ttl(registry._key(1)) > registry.ttl
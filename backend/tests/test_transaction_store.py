@@ -0,0 +1,77 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from app.models import Base
+from app.services import transaction_store
+from app.services.transaction_store import (
+    IdempotencyKeyReused,
+    create_transaction_once,
+    replay,
+    request_hash_of,
+    setup_idempotency_store,
+)
+
+VALUES = {"user_id": "u1", "monto": 10.0, "tipo": "deposito"}
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'transactions.db'}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def test_setup_drops_legacy_response_column(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'transactions.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE idempotency_records (key VARCHAR PRIMARY KEY, request_hash VARCHAR(64) NOT NULL, "
+            "transaction_id INTEGER, response TEXT NOT NULL, created_at DATETIME NOT NULL, "
+            "expires_at DATETIME NOT NULL)"
+        ))
+    Base.metadata.create_all(engine)
+
+    setup_idempotency_store(engine)
+    setup_idempotency_store(engine)
+
+    columns = [column["name"] for column in inspect(engine).get_columns("idempotency_records")]
+    assert "response" not in columns
+
+    with Session(engine) as db:
+        record, created = create_transaction_once(db, VALUES, "k1", request_hash_of(VALUES))
+    assert created
+
+
+def test_retry_resolves_to_the_same_transaction(tmp_path):
+    engine = _engine(tmp_path)
+    request_hash = request_hash_of(VALUES)
+
+    with Session(engine) as db:
+        record, created = create_transaction_once(db, VALUES, "k1", request_hash)
+        retry, retried_created = create_transaction_once(db, VALUES, "k1", request_hash)
+
+    assert created and not retried_created
+    assert record["response"]["id"] == record["transaction_id"]
+    assert "response" not in retry
+    assert replay(retry, request_hash) == record["transaction_id"]
+
+    try:
+        replay(retry, request_hash_of({**VALUES, "monto": 11.0}))
+    except IdempotencyKeyReused:
+        pass
+    else:
+        raise AssertionError("otro contenido con la misma clave debería fallar")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM transactions")).scalar() == 1
+
+
+def test_checked_path_without_upsert(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    monkeypatch.setattr(transaction_store, "_UPSERT_INSERTS", {})
+    request_hash = request_hash_of(VALUES)
+
+    with Session(engine) as db:
+        record, created = create_transaction_once(db, VALUES, "k1", request_hash)
+        retry, retried_created = create_transaction_once(db, VALUES, "k1", request_hash)
+
+    assert created and not retried_created
+    assert retry["transaction_id"] == record["transaction_id"] == record["response"]["id"]
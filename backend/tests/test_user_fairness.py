@@ -0,0 +1,89 @@
+from collections import deque
+import pytest
+from app.celery_app import QUEUE_DEFAULT, QUEUE_HIGH, QUEUE_LOW, QUEUE_OVERFLOW
+from app.services import user_fairness
+
+# Orden en que el worker vacía las colas (queue_order_strategy=priority)
+CONSUME_ORDER = (QUEUE_HIGH, QUEUE_DEFAULT, QUEUE_LOW, QUEUE_OVERFLOW)
+RATE = 2
+BURST = 50
+WORKERS = 8  # Procesos del pool; cada tarea dura un tick (1 s)
+
+
+class FakeBuckets:
+    """Token buckets en memoria con el reloj de la simulación"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.now = 0.0
+        self._buckets = {}
+
+    def take_many(self, requested):
+        granted = {}
+        for user_id, count in requested.items():
+            tokens, ts = self._buckets.get(user_id, (self.burst, self.now))
+            tokens = min(self.burst, tokens + (self.now - ts) * self.rate)
+            granted[user_id] = min(count, int(tokens))
+            self._buckets[user_id] = (tokens - granted[user_id], self.now)
+        return granted
+
+
+@pytest.fixture
+def buckets(monkeypatch):
+    fake = FakeBuckets(RATE, BURST)
+    monkeypatch.setattr(user_fairness, "user_buckets", fake)
+    return fake
+
+
+def test_over_quota_rows_go_to_overflow_whatever_their_class(buckets):
+    rows = [(n, "masivo", "transferencia", 100.0) for n in range(BURST + 10)]
+    rows += [(1000 + n, "masivo", "deposito", 10.0) for n in range(5)]
+    rows.append((2000, "otro", "deposito", 10.0))
+
+    plan = user_fairness.plan_queues(rows)
+
+    assert [plan[n] for n in range(BURST)] == [(QUEUE_HIGH, False)] * BURST
+    assert {plan[n] for n in range(BURST, BURST + 10)} == {(QUEUE_OVERFLOW, True)}
+    assert {plan[1000 + n] for n in range(5)} == {(QUEUE_OVERFLOW, True)}
+    assert plan[2000] == (QUEUE_DEFAULT, False)
+
+    low = user_fairness.plan_queues([(3000, "otro", "deposito", 10.0)], priority="low")
+    assert low[3000] == (QUEUE_LOW, False)
+
+
+def test_other_users_wait_bounded_behind_skewed_backlog(buckets):
+    queues = {queue: deque() for queue in CONSUME_ORDER}
+
+    def submit(rows, priority=None):
+        for transaction_id, (queue, _) in user_fairness.plan_queues(rows, priority).items():
+            queues[queue].append((transaction_id, buckets.now))
+
+    # Un usuario encola 50k transacciones de clase alta, en lotes como el endpoint masivo
+    heavy = [(n, "masivo", "transferencia", 100.0) for n in range(50_000)]
+    for start in range(0, len(heavy), 1000):
+        submit(heavy[start:start + 1000])
+
+    waits = []
+    for tick in range(120):
+        buckets.now = float(tick)
+        # Sigue encolando: su cuota se recarga a RATE por segundo
+        submit([(100_000 + tick, "masivo", "transferencia", 100.0)])
+        if tick % 5 == 0:
+            # Otros usuarios: prioridad normal y baja
+            submit([(200_000 + tick, f"usuario-{tick}", "deposito", 10.0)])
+            submit([(300_000 + tick, f"usuario-{tick}", "deposito", 10.0)], priority="low")
+
+        for _ in range(WORKERS):
+            queue = next((queue for queue in CONSUME_ORDER if queues[queue]), None)
+            if queue is None:
+                break
+            transaction_id, enqueued_at = queues[queue].popleft()
+            if transaction_id >= 200_000:
+                waits.append(tick - enqueued_at)
+
+    # Cada usuario ocupa las colas normales con a lo sumo su ráfaga más RATE por tick
+    assert len(waits) == 2 * 120 // 5
+    assert max(waits) <= BURST // WORKERS + 1
+    # El backlog del usuario masivo sigue pendiente en la cola de excedente
+    assert len(queues[QUEUE_OVERFLOW]) > 49_000
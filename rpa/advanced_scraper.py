@@ -2,8 +2,12 @@
 RPA Avanzado - Scraper con múltiples opciones
 """
 import argparse
-from wikipedia_scraper import WikipediaScraper
-from playwright.sync_api import sync_playwright
+from wikipedia_scraper import WikipediaScraper, FULL_CONTENT_JS
+from http_extractor import NeedsRendering
+from job_runner import CrawlJob
+from crawler import WikiCrawler
+from timing import profiled
+from async_pipeline import AsyncScrapePipeline
 import requests
 
 
@@ -18,56 +22,44 @@ class AdvancedScraper(WikipediaScraper):
         """
         print(f"🤖 Scraping completo de: {url}")
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=headless)
-            page = browser.new_page()
-            
+        if self.http is not None:
             try:
-                page.goto(url, wait_until="domcontentloaded")
-                page.wait_for_selector(".mw-parser-output", timeout=10000)
-                
-                # Extraer todo el contenido
-                content = page.evaluate("""
-                    () => {
-                        const content = document.querySelector('.mw-content-container');
-                        if (!content) return null;
-                        
-                        // Extraer todos los párrafos
-                        const paragraphs = Array.from(content.querySelectorAll('p'))
-                            .map(p => p.innerText.trim())
-                            .filter(text => text.length > 50);
-                        
-                        return {
-                            title: document.title,
-                            paragraphs: paragraphs,
-                            full_text: paragraphs.join('\\n\\n')
-                        };
-                    }
-                """)
-                
-                return content
-                
-            finally:
-                browser.close()
-    
-    def scrape_multiple_pages(self, urls: list, headless: bool = True) -> list:
-        """
-        Scrapea múltiples páginas y genera resúmenes
-        """
-        results = []
+                return self.http.full_content(self.http.fetch(url))
+            except NeedsRendering as e:
+                print(f"↪️  {e}: usando el navegador")
         
-        for i, url in enumerate(urls, 1):
-            print(f"\n📄 Procesando {i}/{len(urls)}: {url}")
+        with self._page(headless) as page:
+            page.goto(url, wait_until="domcontentloaded")
+            page.wait_for_selector(".mw-parser-output", timeout=10000)
             
-            try:
-                result = self.run(url, headless)
-                results.append(result)
-                print("✓ Completado")
-            except Exception as e:
-                print(f"✗ Error: {e}")
-                results.append({"url": url, "error": str(e)})
+            # Extraer todo el contenido
+            content = page.evaluate(FULL_CONTENT_JS)
+            
+            return content
+    
+    def scrape_multiple_pages(
+        self,
+        urls: list,
+        headless: bool = True,
+        concurrency: int = 1,
+        per_host: int = 2
+    ) -> list:
+        """
+        Scrapea múltiples páginas y genera resúmenes.
+        Con concurrency > 1 usa el pipeline asíncrono (varias páginas en paralelo).
+        """
+        if concurrency > 1:
+            pipeline = AsyncScrapePipeline(
+                self,
+                concurrency=concurrency,
+                summarize_concurrency=concurrency,
+                per_host=per_host,
+                headless=headless
+            )
+            return pipeline.run(urls)
         
-        return results
+        # Un solo navegador; los resúmenes se solapan con el scraping de la siguiente página
+        return self.run_pipelined(urls, headless)
     
     def search_and_scrape(self, search_term: str, headless: bool = True) -> dict:
         """
@@ -79,6 +71,13 @@ class AdvancedScraper(WikipediaScraper):
         search_url = f"https://en.wikipedia.org/wiki/{search_term.replace(' ', '_')}"
         
         return self.run(search_url, headless)
+    
+    def crawl(self, seeds: list, max_depth: int = 2, max_pages: int = 100, headless: bool = True) -> dict:
+        """
+        Sigue los enlaces internos desde los artículos semilla (requiere engine="http")
+        """
+        crawler = WikiCrawler(self, max_depth=max_depth, max_pages=max_pages)
+        return crawler.crawl(seeds, headless)
 
 
 def main():
@@ -117,41 +116,177 @@ def main():
         help="Scrapear múltiples URLs"
     )
     
+    parser.add_argument(
+        "--crawl",
+        type=int,
+        metavar="MAX_PAGES",
+        help="Seguir enlaces internos desde la URL hasta MAX_PAGES páginas (usa --engine http)"
+    )
+    
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=2,
+        help="Profundidad máxima de enlaces a seguir con --crawl"
+    )
+    
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="Archivo con URLs (una por línea) para un job reanudable con checkpoint"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Páginas en paralelo para --multiple (modo asíncrono si es > 1)"
+    )
+    
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=2,
+        help="Máximo de peticiones simultáneas por host en modo asíncrono"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        choices=["full", "fast"],
+        default="full",
+        help="Perfil de carga: fast bloquea imágenes, fuentes y trackers"
+    )
+    
+    parser.add_argument(
+        "--screenshot",
+        choices=["always", "on_error", "never"],
+        default="always",
+        help="Cuándo tomar screenshots"
+    )
+    
+    parser.add_argument(
+        "--screenshot-format",
+        choices=["jpeg", "png", "webp"],
+        default="jpeg",
+        help="Formato de los screenshots (webp requiere Pillow)"
+    )
+    
+    parser.add_argument(
+        "--screenshot-quality",
+        type=int,
+        default=80,
+        help="Calidad JPEG/WebP (0-100)"
+    )
+    
+    parser.add_argument(
+        "--full-page",
+        action="store_true",
+        help="Capturar la página completa en lugar del viewport"
+    )
+    
+    parser.add_argument(
+        "--engine",
+        choices=["browser", "http"],
+        default="browser",
+        help="Motor de extracción: http evita el navegador salvo que la página requiera renderizado"
+    )
+    
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=".cache",
+        help="Directorio del caché HTTP y de resultados (por defecto .cache)"
+    )
+    
+    parser.add_argument(
+        "--report",
+        type=str,
+        help="Guardar reporte JSON de tiempos por etapa (p50/p95/p99)"
+    )
+    
+    parser.add_argument(
+        "--profiler",
+        choices=["cprofile", "pyinstrument"],
+        help="Perfilar la ejecución completa"
+    )
+    
+    parser.add_argument(
+        "--profiler-output",
+        type=str,
+        help="Archivo de salida del perfilador (profile.pstats / profile.html)"
+    )
+    
     args = parser.parse_args()
     
-    scraper = AdvancedScraper()
+    scraper = AdvancedScraper(
+        profile=args.profile,
+        screenshot_mode=args.screenshot,
+        engine="http" if args.crawl else args.engine,
+        cache_dir=args.cache,
+        screenshot_options={
+            "format": args.screenshot_format,
+            "quality": args.screenshot_quality,
+            "full_page": args.full_page
+        }
+    )
     headless = not args.show
     
     try:
-        if args.search:
-            # Modo búsqueda
-            result = scraper.search_and_scrape(args.search, headless)
-            print(f"\n✨ Resumen: {result['summary']['summary']}")
+        with profiled(args.profiler, args.profiler_output):
+            if args.search:
+                # Modo búsqueda
+                result = scraper.search_and_scrape(args.search, headless)
+                print(f"\n✨ Resumen: {result['summary']['summary']}")
+            
+            elif args.crawl:
+                # Modo crawl
+                stats = scraper.crawl(
+                    [args.url], max_depth=args.max_depth, max_pages=args.crawl, headless=headless
+                )
+                print(f"\n✅ Crawl: {stats['pages']} páginas")
             
-        elif args.multiple:
-            # Modo múltiple
-            results = scraper.scrape_multiple_pages(args.multiple, headless)
-            print(f"\n✅ Procesadas {len(results)} páginas")
+            elif args.manifest:
+                # Modo job reanudable
+                job = CrawlJob(args.manifest, scraper=scraper)
+                try:
+                    counts = job.run(headless)
+                finally:
+                    job.close()
+                print(f"\n✅ Job terminado: {counts}")
             
-        elif args.full:
-            # Modo completo
-            content = scraper.scrape_full_content(args.url, headless)
-            print(f"\n📝 Extraídos {len(content['paragraphs'])} párrafos")
+            elif args.multiple:
+                # Modo múltiple
+                results = scraper.scrape_multiple_pages(
+                    args.multiple, headless, args.concurrency, args.per_host
+                )
+                print(f"\n✅ Procesadas {len(results)} páginas")
             
-            # Resumir el contenido completo
-            summary = scraper.send_to_summarizer(content['full_text'][:5000])
-            print(f"\n✨ Resumen: {summary['summary']}")
+            elif args.full:
+                # Modo completo
+                content = scraper.scrape_full_content(args.url, headless)
+                print(f"\n📝 Extraídos {len(content['paragraphs'])} párrafos")
             
-        else:
-            # Modo normal
-            result = scraper.run(args.url, headless)
-            print(f"\n✨ Resumen: {result['summary']['summary']}")
+                # Resumir el contenido completo
+                summary = scraper.send_to_summarizer(content['full_text'][:5000])
+                print(f"\n✨ Resumen: {summary['summary']}")
+            
+            else:
+                # Modo normal
+                result = scraper.run(args.url, headless)
+                print(f"\n✨ Resumen: {result['summary']['summary']}")
         
         return 0
         
     except Exception as e:
         print(f"\n❌ Error: {e}")
         return 1
+    
+    finally:
+        scraper.close()
+        if args.report:
+            scraper.timings.write_report(args.report)
+            print(f"\n⏱️  Tiempos por etapa ({args.report}):")
+            scraper.timings.print_summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,263 @@
+"""
+Pipeline asíncrono de scraping con Playwright (API async).
+
+Tres etapas conectadas por colas:
+
+    URLs → [scrape x N páginas] → [resumir x M] → [escritura]
+
+Cada etapa avanza en paralelo con las demás, así que el tiempo total de una
+ejecución grande depende de la concurrencia y no de la suma de latencias.
+Los límites por host evitan saturar a Wikipedia.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright
+from browser_pool import LOAD_PROFILES, should_block
+from wikipedia_scraper import WikipediaScraper, FIRST_PARAGRAPH_JS
+
+_DONE = object()
+
+
+class HostLimiter:
+    """Limita las peticiones simultáneas y el intervalo mínimo por host"""
+
+    def __init__(self, per_host: int = 2, min_interval: float = 0.5):
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self._semaphores = {}
+        self._locks = {}
+        self._last_request = {}
+
+    def _host(self, url: str) -> str:
+        return urlparse(url).netloc
+
+    async def __call__(self, url: str):
+        host = self._host(url)
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host)
+            self._locks[host] = asyncio.Lock()
+
+        await self._semaphores[host].acquire()
+
+        # Espaciar el inicio de peticiones al mismo host
+        async with self._locks[host]:
+            wait = self._last_request.get(host, 0) + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_request[host] = time.monotonic()
+
+        return self._semaphores[host]
+
+
+class AsyncScrapePipeline:
+    def __init__(
+        self,
+        scraper: WikipediaScraper = None,
+        concurrency: int = 4,
+        summarize_concurrency: int = 4,
+        per_host: int = 2,
+        host_interval: float = 0.5,
+        headless: bool = True,
+        queue_size: int = 100
+    ):
+        self.scraper = scraper or WikipediaScraper()
+        self.concurrency = concurrency
+        self.summarize_concurrency = summarize_concurrency
+        self.headless = headless
+        self.queue_size = queue_size
+        self.limiter = HostLimiter(per_host, host_interval)
+
+    def run(self, urls: list) -> list:
+        """Punto de entrada síncrono"""
+        return asyncio.run(self.run_async(urls))
+
+    async def run_async(self, urls: list) -> list:
+        results = [None] * len(urls)
+
+        url_queue = asyncio.Queue()
+        summarize_queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        for index, url in enumerate(urls):
+            url_queue.put_nowait((index, url))
+        for _ in range(self.concurrency):
+            url_queue.put_nowait(_DONE)
+
+        started = time.monotonic()
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=self.headless)
+            context = await browser.new_context()
+            if LOAD_PROFILES[self.scraper.profile]:
+                await context.route("**/*", self._route)
+
+            try:
+                scrapers = [
+                    asyncio.create_task(self._scrape_worker(context, url_queue, summarize_queue, write_queue))
+                    for _ in range(self.concurrency)
+                ]
+                summarizers = [
+                    asyncio.create_task(self._summarize_worker(summarize_queue, write_queue))
+                    for _ in range(self.summarize_concurrency)
+                ]
+                writer = asyncio.create_task(self._write_worker(write_queue, results))
+
+                with self.scraper.results.batch():
+                    # Un scraper que falla no debe impedir que las etapas siguientes
+                    # reciban _DONE: quedarían esperando en get() para siempre
+                    for failure in await asyncio.gather(*scrapers, return_exceptions=True):
+                        if isinstance(failure, Exception):
+                            print(f"✗ Worker de scraping detenido: {failure}")
+                    for _ in summarizers:
+                        await summarize_queue.put(_DONE)
+                    await asyncio.gather(*summarizers)
+                    await write_queue.put(_DONE)
+                    await writer
+
+            finally:
+                await context.close()
+                await browser.close()
+
+        # Escrituras de screenshots que el pool aún no terminó
+        self.scraper.screenshots.flush()
+
+        elapsed = time.monotonic() - started
+        ok = sum(1 for r in results if r and "error" not in r)
+        print(f"⏱️  {len(urls)} páginas en {elapsed:.1f}s ({ok} exitosas, {len(urls) / max(elapsed, 1e-9):.2f} páginas/s)")
+
+        return results
+
+    async def _route(self, route):
+        if should_block(route.request, LOAD_PROFILES[self.scraper.profile]):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _scrape_worker(self, context, url_queue, summarize_queue, write_queue):
+        page = await context.new_page()
+
+        try:
+            while True:
+                item = await url_queue.get()
+                if item is _DONE:
+                    break
+
+                index, url = item
+                timings = self.scraper.timings.page(url)
+                with timings.span("host_wait"):
+                    semaphore = await self.limiter(url)
+                try:
+                    scrape_result = await self._scrape(page, index, url, timings)
+                    await summarize_queue.put((index, scrape_result, timings))
+                except Exception as e:
+                    print(f"✗ Error scrapeando {url}: {e}")
+                    await write_queue.put((index, {"url": url, "error": str(e)}, timings))
+                    if page.is_closed():
+                        page = await context.new_page()
+                finally:
+                    semaphore.release()
+        finally:
+            await page.close()
+
+    @asynccontextmanager
+    async def _measure(self, page):
+        """Tiempo, respuestas y bytes recibidos de la página (como WikipediaScraper._measure)"""
+        metrics = {"profile": self.scraper.profile, "requests": 0, "bytes": 0}
+
+        def on_response(response):
+            metrics["requests"] += 1
+
+        async def on_finished(request):
+            try:
+                metrics["bytes"] += max(0, (await request.sizes())["responseBodySize"])
+            except Exception:
+                pass  # La página se cerró antes de leer los tamaños
+
+        page.on("response", on_response)
+        page.on("requestfinished", on_finished)
+        started = time.perf_counter()
+
+        try:
+            yield metrics
+        finally:
+            page.remove_listener("response", on_response)
+            page.remove_listener("requestfinished", on_finished)
+            metrics["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def _scrape(self, page, index: int, url: str, timings) -> dict:
+        async with self._measure(page) as metrics:
+            with timings.span("goto"):
+                await page.goto(url, wait_until="domcontentloaded")
+            with timings.span("wait_for_selector"):
+                await page.wait_for_selector(".mw-parser-output", timeout=100000)
+
+            # Sufijo con el índice: varias páginas terminan en el mismo segundo
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            screenshot_path = None
+            if self.scraper.screenshot_mode == "always":
+                with timings.span("screenshot"):
+                    screenshot_path = await self.scraper.screenshots.capture_async(page)
+
+            with timings.span("evaluate"):
+                title = await page.title()
+                first_paragraph = await page.evaluate(FIRST_PARAGRAPH_JS)
+
+        if not first_paragraph:
+            if self.scraper.screenshot_mode == "on_error":
+                await self.scraper.screenshots.capture_async(page)
+            raise Exception("No se pudo extraer el primer párrafo")
+
+        print(f"✓ {title}")
+
+        return {
+            "url": url,
+            "title": title,
+            "first_paragraph": first_paragraph,
+            "timestamp": f"{timestamp}_{index}",
+            "screenshot": screenshot_path,
+            "metrics": metrics
+        }
+
+    async def _summarize_worker(self, summarize_queue, write_queue):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            item = await summarize_queue.get()
+            if item is _DONE:
+                break
+
+            index, scrape_result, timings = item
+            try:
+                # send_to_summarizer es bloqueante (requests): se ejecuta en un hilo
+                with timings.span("summarize"):
+                    summary = await loop.run_in_executor(
+                        None, self.scraper.send_to_summarizer, scrape_result["first_paragraph"]
+                    )
+                await write_queue.put((index, {**scrape_result, "summary": summary}, timings))
+            except Exception as e:
+                await write_queue.put((index, {**scrape_result, "error": str(e)}, timings))
+
+    async def _write_worker(self, write_queue, results: list):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            item = await write_queue.get()
+            if item is _DONE:
+                break
+
+            index, result, timings = item
+            results[index] = result
+
+            try:
+                if "error" not in result:
+                    with timings.span("store"):
+                        await loop.run_in_executor(None, self.scraper.results.add, result)
+            except Exception as e:
+                # Si el writer se detiene, los resumidores se bloquean con la cola llena
+                print(f"✗ Error guardando {result['url']}: {e}")
+            finally:
+                self.scraper.timings.finish(timings)
+
@@ -0,0 +1,112 @@
+"""
+Benchmark de motores de extracción: HTTP (lxml) vs navegador (Playwright).
+
+Genera páginas tipo Wikipedia, las sirve desde un servidor HTTP local y mide
+páginas por segundo con cada motor. No depende de la red ni del backend.
+
+Uso:
+    python benchmark_engines.py [num_paginas]
+"""
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from browser_pool import BrowserPool
+from http_extractor import HttpExtractor
+from wikipedia_scraper import FIRST_PARAGRAPH_JS
+
+FIXTURE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Artículo {n} - Wikipedia</title></head>
+<body>
+<div class="mw-content-container">
+  <div class="mw-parser-output">
+    <p class="mw-empty-elt"></p>
+    <p>Coordinates: 40.7128° N, 74.0060° W, ubicación de ejemplo para el artículo número {n}.</p>
+    <p><b>Artículo {n}</b> es una página de prueba generada para el benchmark del RPA.
+    Contiene texto suficiente para superar el umbral de cincuenta caracteres.<sup>[1]</sup></p>
+    {filler}
+  </div>
+</div>
+</body>
+</html>
+"""
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def build_fixtures(directory: Path, pages: int) -> None:
+    filler = "\n    ".join(
+        f"<p>Párrafo de relleno {i} con contenido suficiente para simular un artículo real de Wikipedia.</p>"
+        for i in range(40)
+    )
+    for n in range(pages):
+        (directory / f"page_{n}.html").write_text(
+            FIXTURE_TEMPLATE.format(n=n, filler=filler), encoding="utf-8"
+        )
+
+
+def serve(directory: Path) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_http(urls: list) -> float:
+    extractor = HttpExtractor()
+    started = time.perf_counter()
+    for url in urls:
+        extractor.first_paragraph(extractor.fetch(url))
+    elapsed = time.perf_counter() - started
+    extractor.close()
+    return len(urls) / elapsed
+
+
+def bench_browser(urls: list) -> float:
+    with BrowserPool() as pool:
+        # El arranque de Chromium no se cuenta: solo el costo por página
+        with pool.page():
+            pass
+
+        started = time.perf_counter()
+        for url in urls:
+            with pool.page() as page:
+                page.goto(url, wait_until="domcontentloaded")
+                page.wait_for_selector(".mw-parser-output")
+                page.evaluate(FIRST_PARAGRAPH_JS)
+        return len(urls) / (time.perf_counter() - started)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        build_fixtures(directory, pages)
+        server = serve(directory)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        urls = [f"{base_url}/page_{n}.html" for n in range(pages)]
+
+        print(f"📊 Benchmark con {pages} páginas locales")
+
+        http_rate = bench_http(urls)
+        print(f"   HTTP (lxml):  {http_rate:8.1f} páginas/s")
+
+        try:
+            browser_rate = bench_browser(urls)
+            print(f"   Navegador:    {browser_rate:8.1f} páginas/s")
+            print(f"   Mejora:       {http_rate / browser_rate:8.1f}x")
+        except Exception as e:
+            print(f"   Navegador no disponible: {e}")
+
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
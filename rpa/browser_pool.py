@@ -0,0 +1,195 @@
+"""
+Pool de navegador persistente para el RPA.
+
+Mantiene un único Chromium abierto durante toda la ejecución y reutiliza
+contextos y páginas, de modo que el costo por página se reduce a navegar y
+extraer. Los contextos se reciclan cada N páginas para acotar el consumo de
+memoria, y el navegador se relanza si deja de responder.
+"""
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+
+# Recursos que no aportan al texto extraído. Las hojas de estilo no se
+# bloquean: innerText depende del CSS (sin él, el contenido con display:none
+# aparece en el texto) y son una o dos peticiones cacheadas por página
+FAST_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Scripts de analítica/telemetría (se bloquean en el perfil rápido)
+TRACKING_URL_PATTERNS = (
+    "intake-analytics.wikimedia.org",
+    "/beacon/",
+    "google-analytics.com",
+    "googletagmanager.com",
+)
+
+# Perfiles de carga: tipos de recurso bloqueados en cada uno
+LOAD_PROFILES = {
+    "full": frozenset(),
+    "fast": FAST_BLOCKED_RESOURCE_TYPES,
+}
+
+
+def should_block(request, blocked_resource_types) -> bool:
+    """Decide si abortar una petición según el perfil de carga"""
+    if not blocked_resource_types:
+        return False
+    if request.resource_type in blocked_resource_types:
+        return True
+    return any(pattern in request.url for pattern in TRACKING_URL_PATTERNS)
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        headless: bool = True,
+        max_pages_per_context: int = 50,
+        max_idle_pages: int = 2,
+        context_options: dict = None,
+        blocked_resource_types=frozenset()
+    ):
+        self.headless = headless
+        self.max_pages_per_context = max_pages_per_context
+        self.max_idle_pages = max_idle_pages
+        self.context_options = context_options or {}
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._context_pages = 0
+        self._idle_pages = []
+
+        self.pages_served = 0
+        self.browser_launches = 0
+        self.context_recycles = 0
+        self.blocked_requests = 0
+
+    def __enter__(self):
+        # Chromium se lanza en el primer acquire(): si ninguna página lo
+        # necesita (p. ej. motor HTTP), no se paga el arranque
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._ensure_browser()
+
+    def close(self):
+        self._close_context()
+
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+    def _ensure_browser(self):
+        """Health check: relanza Chromium si se cerró o se cayó"""
+        if self._browser is not None and self._browser.is_connected():
+            return
+
+        self._idle_pages = []
+        self._context = None
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self.browser_launches += 1
+
+    def _close_context(self):
+        self._idle_pages = []
+        if self._context is not None:
+            try:
+                self._context.close()
+            except Exception:
+                pass
+            self._context = None
+        self._context_pages = 0
+
+    def _ensure_context(self):
+        if self._context is not None and self._context_pages >= self.max_pages_per_context:
+            self._close_context()
+            self.context_recycles += 1
+
+        if self._context is None:
+            self._context = self._browser.new_context(**self.context_options)
+            self._context_pages = 0
+            if self.blocked_resource_types:
+                self._context.route("**/*", self._route)
+
+    def _route(self, route):
+        if should_block(route.request, self.blocked_resource_types):
+            self.blocked_requests += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    def acquire(self):
+        """Retorna una página lista para navegar"""
+        if self._playwright is None:
+            self.start()
+
+        self._ensure_browser()
+        self._ensure_context()
+
+        page = None
+        while self._idle_pages:
+            candidate = self._idle_pages.pop()
+            if not candidate.is_closed():
+                page = candidate
+                break
+
+        if page is None:
+            page = self._context.new_page()
+
+        self._context_pages += 1
+        self.pages_served += 1
+        return page
+
+    def release(self, page, healthy: bool = True):
+        """Devuelve la página al pool; las páginas con error se descartan"""
+        reusable = (
+            healthy
+            and not page.is_closed()
+            and page.context is self._context
+            and len(self._idle_pages) < self.max_idle_pages
+        )
+
+        if reusable:
+            self._idle_pages.append(page)
+            return
+
+        try:
+            page.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def page(self):
+        """
+        Uso:
+            with pool.page() as page:
+                page.goto(url)
+        """
+        page = self.acquire()
+        healthy = True
+        try:
+            yield page
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.release(page, healthy)
+
+    def stats(self) -> dict:
+        return {
+            "pages_served": self.pages_served,
+            "browser_launches": self.browser_launches,
+            "context_recycles": self.context_recycles,
+            "blocked_requests": self.blocked_requests
+        }
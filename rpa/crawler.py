@@ -0,0 +1,231 @@
+"""
+Crawl de Wikipedia siguiendo enlaces internos.
+
+Parte de uno o más artículos semilla y sigue los enlaces /wiki/ del mismo host
+hasta una profundidad o un presupuesto de páginas:
+
+- Frontera con prioridad (por defecto, menor profundidad primero) y sin
+  duplicados: cada URL se encola una sola vez.
+- Conjunto de visitados compacto: filtro de Bloom (~1.2 MB por millón de URLs
+  con 1% de falsos positivos). Un falso positivo solo omite una URL.
+- Límite de frecuencia por host.
+
+Usa el motor HTTP; las páginas que requieren renderizado se extraen con el
+navegador, pero sus enlaces no se siguen.
+
+Uso:
+    python crawler.py https://en.wikipedia.org/wiki/Python_(programming_language) --max-pages 100
+"""
+import argparse
+import hashlib
+import heapq
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Iterable
+from urllib.parse import urljoin, urlparse, urlunparse
+from http_extractor import NeedsRendering
+from wikipedia_scraper import WikipediaScraper
+
+
+# Copia de backend/app/services/bloom_filter.py: el RPA se despliega sin el backend
+def bloom_parameters(capacity: int, error_rate: float):
+    """(bits, funciones hash) óptimos para la capacidad y tasa de falsos positivos"""
+    size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+    return size, max(1, round(size / capacity * math.log(2)))
+
+
+class BloomFilter:
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.size, self.hashes = bloom_parameters(capacity, error_rate)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key: str):
+        # Doble hashing (Kirsch-Mitzenmacher) sobre un único digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def _set(self, key: str) -> bool:
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def add_many(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._set(key)
+
+    def add(self, key: str) -> bool:
+        """Agrega la clave; retorna False si (probablemente) ya estaba"""
+        with self._lock:
+            return self._set(key)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class Frontier:
+    """Cola de prioridad de URLs por visitar, deduplicada con un filtro de Bloom"""
+
+    def __init__(self, capacity: int = 1_000_000, priority=None):
+        self.seen = BloomFilter(capacity)
+        self.priority = priority or (lambda url, depth: depth)
+        self._heap = []
+        self._seq = 0
+
+    def push(self, url: str, depth: int) -> bool:
+        if not self.seen.add(url):
+            return False
+        heapq.heappush(self._heap, (self.priority(url, depth), self._seq, url, depth))
+        self._seq += 1
+        return True
+
+    def pop(self):
+        _, _, url, depth = heapq.heappop(self._heap)
+        return url, depth
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def normalize_url(url: str) -> str:
+    """Esquema y host en minúsculas, sin query ni fragmento"""
+    parts = urlparse(url)
+    return urlunparse((parts.scheme.lower(), parts.netloc.lower(), parts.path, "", "", ""))
+
+
+class WikiCrawler:
+    def __init__(
+        self,
+        scraper: WikipediaScraper = None,
+        max_depth: int = 2,
+        max_pages: int = 100,
+        host_interval: float = 0.5,
+        summarize: bool = False,
+        frontier_capacity: int = 1_000_000
+    ):
+        self.scraper = scraper or WikipediaScraper(engine="http")
+        if self.scraper.http is None:
+            raise ValueError("El crawler requiere un scraper con engine='http'")
+
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.host_interval = host_interval
+        self.summarize = summarize
+        self.frontier = Frontier(frontier_capacity)
+        self._last_request = {}
+
+    def _wait_for_host(self, url: str):
+        host = urlparse(url).netloc
+        wait = self._last_request.get(host, 0) + self.host_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request[host] = time.monotonic()
+
+    def _visit(self, url: str, depth: int, headless: bool) -> dict:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        try:
+            with self.scraper.span("http_fetch"):
+                fetched = self.scraper.http.fetch(url)
+            with self.scraper.span("http_parse"):
+                article = self.scraper.http.article(fetched)
+        except NeedsRendering:
+            result = self.scraper._scrape_browser(url, headless)
+            return {**result, "depth": depth, "links": 0}
+
+        host = urlparse(url).netloc
+        if depth < self.max_depth:
+            for href in article["links"]:
+                link = normalize_url(urljoin(url, href))
+                if urlparse(link).netloc == host:
+                    self.frontier.push(link, depth + 1)
+
+        return {
+            "url": url,
+            "title": article["title"],
+            "first_paragraph": article["first_paragraph"],
+            "timestamp": timestamp,
+            "screenshot": None,
+            "depth": depth,
+            "links": len(article["links"])
+        }
+
+    def crawl(self, seeds: list, headless: bool = True) -> dict:
+        for seed in seeds:
+            self.frontier.push(normalize_url(seed), 0)
+
+        pages = 0
+        errors = 0
+        started = time.monotonic()
+
+        with self.scraper.browser_session(headless), self.scraper.results.batch():
+            while self.frontier and pages < self.max_pages:
+                url, depth = self.frontier.pop()
+                self._wait_for_host(url)
+
+                try:
+                    with self.scraper.page_timing(url):
+                        result = self._visit(url, depth, headless)
+                        if self.summarize and result["first_paragraph"]:
+                            result["summary"] = self.scraper.send_to_summarizer(result["first_paragraph"])
+                        with self.scraper.span("store"):
+                            self.scraper.results.add(result)
+                    pages += 1
+                    print(f"✓ [{pages}/{self.max_pages}] d={depth} {result['title']} "
+                          f"(frontera: {len(self.frontier)})")
+                except Exception as e:
+                    errors += 1
+                    print(f"✗ {url}: {e}")
+
+        elapsed = time.monotonic() - started
+        stats = {
+            "pages": pages,
+            "errors": errors,
+            "frontier": len(self.frontier),
+            "seen": self.frontier.seen.count,
+            "elapsed_s": round(elapsed, 1),
+            "pages_per_s": round(pages / elapsed, 2) if elapsed > 0 else 0
+        }
+        print(f"\n🕸️  Crawl terminado: {stats}")
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl de Wikipedia siguiendo enlaces internos")
+    parser.add_argument("seeds", nargs="+", help="Artículos semilla")
+    parser.add_argument("--max-depth", type=int, default=2)
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--host-interval", type=float, default=0.5, help="Segundos entre peticiones al mismo host")
+    parser.add_argument("--summarize", action="store_true", help="Enviar cada página al asistente de IA")
+    parser.add_argument("--cache", nargs="?", const=".cache", help="Directorio del caché HTTP")
+
+    args = parser.parse_args()
+
+    scraper = WikipediaScraper(engine="http", screenshot_mode="never", cache_dir=args.cache)
+    crawler = WikiCrawler(
+        scraper,
+        max_depth=args.max_depth,
+        max_pages=args.max_pages,
+        host_interval=args.host_interval,
+        summarize=args.summarize
+    )
+    try:
+        crawler.crawl(args.seeds)
+    finally:
+        scraper.close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
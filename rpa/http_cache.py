@@ -0,0 +1,184 @@
+"""
+Caché HTTP persistente en disco para el RPA.
+
+- Respuestas por URL con su ETag / Last-Modified, revalidadas con peticiones
+  condicionales (If-None-Match / If-Modified-Since): un 304 se sirve desde disco.
+- Tamaño acotado con desalojo LRU.
+- Memo de resultados por hash de contenido: extracciones por hash del HTML y
+  resúmenes por hash del texto, para no volver a parsear ni resumir páginas
+  que no cambiaron. Con su propio límite de tamaño y el mismo desalojo LRU.
+
+Todo se guarda en un único archivo SQLite.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+SCHEMA = """
+-- body va al final: SQLite no necesita leer sus páginas de overflow
+-- para consultar los metadatos (tamaño total, orden LRU)
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_responses_last_access ON responses (last_access);
+
+CREATE TABLE IF NOT EXISTS memo (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    created_at REAL NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS ix_memo_last_access ON memo (last_access);
+"""
+
+
+def content_hash(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class HttpCache:
+    def __init__(
+        self,
+        directory: str = ".cache",
+        max_bytes: int = 200 * 1024 * 1024,
+        max_memo_bytes: int = 50 * 1024 * 1024
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "http_cache.sqlite3")
+        self.max_bytes = max_bytes
+        self.max_memo_bytes = max_memo_bytes
+
+        # El pipeline asíncrono usa el caché desde hilos del executor
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(memo)")}
+        if columns and "size" not in columns:
+            # Memo de una versión sin límite de tamaño: es solo caché, se descarta
+            self._conn.execute("DROP TABLE memo")
+        self._conn.executescript(SCHEMA)
+
+        # revalidated: 304 servidos desde disco; misses: descargas completas
+        self._counters = {"revalidated": 0, "misses": 0, "memo_hits": 0}
+        self._counters_lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Respuestas HTTP ---
+
+    def get(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, content_hash FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        body, etag, last_modified, digest = row
+        return {
+            "body": body,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": digest
+        }
+
+    def conditional_headers(self, entry: Optional[dict]) -> dict:
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def count(self, counter: str):
+        """Incrementa un contador de stats(); se llama desde varios hilos"""
+        with self._counters_lock:
+            self._counters[counter] += 1
+
+    def touch(self, url: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url)
+            )
+
+    def put(self, url: str, body: bytes, etag: str, last_modified: str) -> str:
+        digest = content_hash(body)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, size, last_access, content_hash, etag, last_modified, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, len(body), time.time(), digest, etag, last_modified, body)
+            )
+            self._evict("responses", self.max_bytes)
+
+        return digest
+
+    def _evict(self, table: str, max_bytes: int):
+        """Desaloja las filas menos usadas de la tabla hasta quedar bajo max_bytes"""
+        total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+        if total <= max_bytes:
+            return
+
+        rows = self._conn.execute(f"SELECT rowid, size FROM {table} ORDER BY last_access").fetchall()
+        evicted = []
+        for rowid, size in rows:
+            if total <= max_bytes:
+                break
+            evicted.append((rowid,))
+            total -= size
+
+        self._conn.executemany(f"DELETE FROM {table} WHERE rowid = ?", evicted)
+
+    # --- Memo por hash de contenido ---
+
+    def memo_get(self, kind: str, key: str) -> Optional[dict]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value FROM memo WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE memo SET last_access = ? WHERE kind = ? AND key = ?", (time.time(), kind, key)
+                )
+        if row is None:
+            return None
+        self.count("memo_hits")
+        return json.loads(row[0])
+
+    def memo_put(self, kind: str, key: str, value: dict):
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO memo (kind, key, size, last_access, created_at, value) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, len(data.encode("utf-8")), now, now, data)
+            )
+            self._evict("memo", self.max_memo_bytes)
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            return dict(self._counters)
@@ -0,0 +1,251 @@
+"""
+Extracción de artículos de Wikipedia sin navegador.
+
+Descarga el HTML con una sesión HTTP keep-alive (pool de conexiones) y lo
+parsea con lxml, replicando las reglas JS de extracción del scraper:
+
+- Contenedor: `.mw-content-container`
+- Párrafos: todos los `p` dentro del contenedor, con el texto que daría
+  innerText: sin nodos ocultos (scripts, estilos, display:none en línea, el
+  atributo hidden y las clases que oculta el CSS de Wikipedia), <br> como
+  salto de línea y el resto de espacios colapsados (&nbsp; se conserva)
+- Primer párrafo: el primero con más de 50 caracteres que no empiece con "Coordinates:"
+- Contenido completo: todos los párrafos con más de 50 caracteres
+
+Si la página no trae `.mw-parser-output` en el HTML (requiere renderizado),
+se lanza NeedsRendering para que el scraper use Playwright.
+
+Con un HttpCache las descargas se revalidan con peticiones condicionales y
+las extracciones se memorizan por hash del HTML.
+"""
+import re
+from collections import namedtuple
+from urllib.parse import unquote
+import requests
+from requests.adapters import HTTPAdapter
+from http_cache import HttpCache, content_hash
+
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    # parse() lanza NeedsRendering y el scraper usa el navegador
+    LXML_AVAILABLE = False
+
+# Equivalente a ocultos por innerText: no aportan texto visible
+_HIDDEN_TAGS = frozenset({"style", "script", "noscript", "template"})
+# Clases con display:none en el CSS de Wikipedia
+_HIDDEN_CLASSES = frozenset({"mw-empty-elt", "geo-nondefault", "geo-multi-punct", "sortkey"})
+_HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.IGNORECASE)
+# Elementos que innerText separa con un salto de línea
+_BLOCK_TAGS = frozenset({
+    "address", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure", "h1", "h2",
+    "h3", "h4", "h5", "h6", "li", "ol", "pre", "table", "tr", "ul",
+})
+# Solo espacios ASCII: innerText conserva &nbsp; (U+00A0)
+_WHITESPACE = re.compile(r"[ \t\n\r\f]+")
+# Marcadores de salto mientras se colapsan los espacios (uso privado de Unicode)
+_BR = "\ue000"
+_BLOCK = "\ue001"
+_BLOCK_BREAKS = re.compile(f"(?: *{_BLOCK})+")
+_LINE_EDGES = re.compile(r" *\n *")
+
+# Espacios de nombres de MediaWiki que no son artículos ("Talk", "User talk"...
+# se reconocen por el sufijo). Un título puede llevar ":" (Avengers:_Doomsday)
+_NAMESPACES = frozenset({
+    "special", "media", "file", "image", "help", "category", "talk", "user",
+    "wikipedia", "wp", "project", "template", "portal", "draft", "module",
+    "mediawiki", "timedtext", "book", "gadget", "gadget definition",
+    "education program",
+})
+
+
+# content: HTML en bytes (lxml detecta el charset del <meta>); from_cache: True si hubo 304
+FetchedPage = namedtuple("FetchedPage", ["url", "content", "content_hash", "from_cache"])
+
+
+def _in_namespace(title: str) -> bool:
+    if ":" not in title:
+        return False
+    prefix = unquote(title.split(":", 1)[0]).replace("_", " ").strip().lower()
+    return prefix in _NAMESPACES or prefix.endswith(" talk")
+
+
+def _is_hidden(element) -> bool:
+    if not isinstance(element.tag, str):
+        return False  # Comentarios e instrucciones de procesamiento
+    if element.tag in _HIDDEN_TAGS or element.get("hidden") is not None:
+        return True
+    if _HIDDEN_CLASSES.intersection((element.get("class") or "").split()):
+        return True
+    return bool(_HIDDEN_STYLE.search(element.get("style") or ""))
+
+
+def _inner_text(paragraph) -> str:
+    """Texto del párrafo como innerText.trim(), con los nodos ocultos ya eliminados"""
+    for element in paragraph.iterdescendants():
+        if element.tag == "br":
+            element.tail = _BR + (element.tail or "")
+        elif element.tag in _BLOCK_TAGS:
+            element.text = _BLOCK + (element.text or "")
+            element.tail = _BLOCK + (element.tail or "")
+
+    # Los saltos de bloque consecutivos cuentan como uno y no quedan en los
+    # extremos; cada <br> es un salto literal
+    text = _WHITESPACE.sub(" ", paragraph.text_content()).strip(" " + _BLOCK)
+    text = _BLOCK_BREAKS.sub("\n", text).replace(_BR, "\n")
+    return _LINE_EDGES.sub("\n", text).strip()
+
+
+class NeedsRendering(Exception):
+    """La página no se puede extraer sin un navegador"""
+
+
+class HttpExtractor:
+    def __init__(self, pool_size: int = 10, timeout: float = 15, cache: HttpCache = None):
+        self.timeout = timeout
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": "WikipediaScraperRPA/1.0 (requests)",
+            "Accept": "text/html",
+        })
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def fetch(self, url: str) -> FetchedPage:
+        entry = self.cache.get(url) if self.cache else None
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(url)
+            self.cache.count("revalidated")
+            return FetchedPage(url, entry["body"], entry["content_hash"], True)
+
+        response.raise_for_status()
+        body = response.content
+
+        if self.cache:
+            self.cache.count("misses")
+            digest = self.cache.put(
+                url,
+                body,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified")
+            )
+        else:
+            digest = content_hash(body)
+
+        return FetchedPage(url, body, digest, False)
+
+    def _memoized(self, kind: str, page: FetchedPage, extract) -> dict:
+        """Reutiliza la extracción si ya se parseó un HTML idéntico"""
+        if self.cache is None:
+            return extract(page.content)
+
+        cached = self.cache.memo_get(kind, page.content_hash)
+        if cached is not None:
+            return cached
+
+        result = extract(page.content)
+        self.cache.memo_put(kind, page.content_hash, result)
+        return result
+
+    def first_paragraph(self, page: FetchedPage) -> dict:
+        return self._memoized("first_paragraph", page, self.extract_first_paragraph)
+
+    def full_content(self, page: FetchedPage) -> dict:
+        return self._memoized("full_content", page, self.extract_full_content)
+
+    def article(self, page: FetchedPage) -> dict:
+        return self._memoized("article", page, self.extract_article)
+
+    def parse(self, html):
+        if not LXML_AVAILABLE:
+            raise NeedsRendering("lxml no disponible")
+
+        document = lxml_html.fromstring(html)
+
+        if not document.xpath("//*[contains(concat(' ', normalize-space(@class), ' '), ' mw-parser-output ')]"):
+            raise NeedsRendering("La página no contiene .mw-parser-output")
+
+        return document
+
+    def _title(self, document) -> str:
+        title = document.find(".//title")
+        return title.text_content().strip() if title is not None else ""
+
+    def _paragraphs(self, document) -> list:
+        containers = document.xpath(
+            "//*[contains(concat(' ', normalize-space(@class), ' '), ' mw-content-container ')]"
+        )
+        if not containers:
+            return []
+
+        # Primero se recolecta y después se elimina: drop_tree() durante iter()
+        # altera el recorrido. drop_tree conserva el texto que sigue al nodo
+        paragraphs = list(containers[0].iter("p"))
+        hidden = [element for p in paragraphs for element in p.iterdescendants() if _is_hidden(element)]
+        for element in hidden:
+            element.drop_tree()
+
+        return [_inner_text(p) for p in paragraphs]
+
+    def extract_first_paragraph(self, html) -> dict:
+        document = self.parse(html)
+
+        first_paragraph = None
+        for text in self._paragraphs(document):
+            if len(text) > 50 and not text.startswith("Coordinates:"):
+                first_paragraph = text
+                break
+
+        if not first_paragraph:
+            raise NeedsRendering("No se encontró el primer párrafo en el HTML")
+
+        return {"title": self._title(document), "first_paragraph": first_paragraph}
+
+    def _links(self, document) -> list:
+        """Enlaces internos a artículos (/wiki/Titulo), sin espacios de nombres ni anclas"""
+        links = []
+        seen = set()
+        for href in document.xpath(
+            "//*[contains(concat(' ', normalize-space(@class), ' '), ' mw-parser-output ')]//a/@href"
+        ):
+            if not href.startswith("/wiki/") or _in_namespace(href[len("/wiki/"):]):
+                continue
+            href = href.split("#", 1)[0]
+            if href not in seen:
+                seen.add(href)
+                links.append(href)
+        return links
+
+    def extract_article(self, html) -> dict:
+        """Título, primer párrafo (o None) y enlaces internos, con un solo parseo"""
+        document = self.parse(html)
+        links = self._links(document)
+
+        first_paragraph = None
+        for text in self._paragraphs(document):
+            if len(text) > 50 and not text.startswith("Coordinates:"):
+                first_paragraph = text
+                break
+
+        return {"title": self._title(document), "first_paragraph": first_paragraph, "links": links}
+
+    def extract_full_content(self, html) -> dict:
+        document = self.parse(html)
+        paragraphs = [text for text in self._paragraphs(document) if len(text) > 50]
+
+        return {
+            "title": self._title(document),
+            "paragraphs": paragraphs,
+            "full_text": "\n\n".join(paragraphs)
+        }
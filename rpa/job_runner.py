@@ -0,0 +1,196 @@
+"""
+Jobs de scraping reanudables con checkpoint por URL.
+
+Recibe un manifiesto (una URL por línea) y guarda el estado de cada URL en
+SQLite a medida que avanza. Si el proceso se cae, al relanzarlo con el mismo
+manifiesto se saltan las URLs completadas y se reintentan las fallidas con
+backoff exponencial.
+
+Uso:
+    python job_runner.py urls.txt [--engine http] [--max-attempts 3]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from wikipedia_scraper import WikipediaScraper
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, done, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_urls_status_next ON urls (status, next_attempt_at);
+"""
+
+
+def read_manifest(path: str) -> list:
+    """Una URL por línea; se ignoran líneas vacías y comentarios (#)"""
+    with open(path, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+class CrawlJob:
+    def __init__(
+        self,
+        manifest_path: str,
+        scraper: WikipediaScraper = None,
+        checkpoint_path: str = None,
+        max_attempts: int = 3,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+        progress_every: int = 10
+    ):
+        self.manifest_path = manifest_path
+        self.scraper = scraper or WikipediaScraper()
+        self.checkpoint_path = checkpoint_path or f"{os.path.splitext(manifest_path)[0]}.checkpoint.sqlite3"
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.progress_every = progress_every
+
+        self._conn = sqlite3.connect(self.checkpoint_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def load_manifest(self) -> int:
+        """Registra las URLs nuevas del manifiesto sin tocar las ya conocidas"""
+        urls = read_manifest(self.manifest_path)
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, position) VALUES (?, ?)",
+                [(url, position) for position, url in enumerate(urls)]
+            )
+        return len(urls)
+
+    def counts(self) -> dict:
+        rows = self._conn.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def _next(self):
+        return self._conn.execute(
+            "SELECT url, attempts, next_attempt_at FROM urls "
+            "WHERE status != 'done' AND attempts < ? "
+            "ORDER BY next_attempt_at, position LIMIT 1",
+            (self.max_attempts,)
+        ).fetchone()
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_base * (2 ** (attempts - 1)), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _mark_done(self, url: str):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE urls SET status = 'done', attempts = attempts + 1, last_error = NULL, "
+                "updated_at = ? WHERE url = ?",
+                (time.time(), url)
+            )
+
+    def _mark_failed(self, url: str, attempts: int, error: str):
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "UPDATE urls SET status = 'failed', attempts = ?, last_error = ?, "
+                "next_attempt_at = ?, updated_at = ? WHERE url = ?",
+                (attempts, error, now + self._backoff(attempts), now, url)
+            )
+
+    def run(self, headless: bool = True) -> dict:
+        total = self.load_manifest()
+        already_done = self.counts().get("done", 0)
+
+        print(f"📋 Job: {self.manifest_path} ({total} URLs, {already_done} ya completadas)")
+        print(f"💾 Checkpoint: {self.checkpoint_path}")
+
+        processed = 0
+        started = time.monotonic()
+
+        # Sin batch(): cada resultado se escribe antes de marcar la URL como completada
+        with self.scraper.browser_session(headless):
+            while True:
+                row = self._next()
+                if row is None:
+                    break
+
+                url, attempts, next_attempt_at = row
+                wait = next_attempt_at - time.time()
+                if wait > 0:
+                    print(f"⏳ Reintento de {url} en {wait:.1f}s")
+                    time.sleep(wait)
+
+                try:
+                    self.scraper.run(url, headless)
+                    self._mark_done(url)
+                except Exception as e:
+                    print(f"✗ Intento {attempts + 1}/{self.max_attempts} fallido: {e}")
+                    self._mark_failed(url, attempts + 1, str(e))
+
+                processed += 1
+                if processed % self.progress_every == 0:
+                    self._print_progress(processed, started)
+
+        self._print_progress(processed, started)
+        return self.counts()
+
+    def _print_progress(self, processed: int, started: float):
+        counts = self.counts()
+        done = counts.get("done", 0)
+        total = sum(counts.values())
+        pending = self._conn.execute(
+            "SELECT COUNT(*) FROM urls WHERE status != 'done' AND attempts < ?", (self.max_attempts,)
+        ).fetchone()[0]
+
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed > 0 else 0
+        eta = f"{pending / rate:.0f}s" if rate > 0 and pending else "-"
+
+        print(
+            f"📊 {done}/{total} completadas, {counts.get('failed', 0)} fallidas, "
+            f"{pending} pendientes | {rate:.2f} páginas/s | ETA {eta}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job de scraping reanudable")
+    parser.add_argument("manifest", help="Archivo con una URL por línea")
+    parser.add_argument("--checkpoint", help="Archivo SQLite de checkpoint")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--engine", choices=["browser", "http"], default="browser")
+    parser.add_argument("--show", action="store_true", help="Mostrar el navegador")
+
+    args = parser.parse_args()
+
+    scraper = WikipediaScraper(engine=args.engine)
+    job = CrawlJob(
+        args.manifest,
+        scraper=scraper,
+        checkpoint_path=args.checkpoint,
+        max_attempts=args.max_attempts
+    )
+
+    try:
+        counts = job.run(headless=not args.show)
+        print(f"\n✅ Job terminado: {counts}")
+        return 0 if not counts.get("failed") else 1
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrumpido: vuelve a ejecutar el mismo comando para reanudar")
+        return 130
+    finally:
+        job.close()
+        scraper.close()
+
+
+if __name__ == "__main__":
+    exit(main())
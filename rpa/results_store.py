@@ -0,0 +1,184 @@
+"""
+Almacén indexado de resultados del RPA (SQLite).
+
+Reemplaza los archivos result_<timestamp>.json: cada resultado es una fila
+indexada por URL, título y fecha, así que consultas como "último resultado de
+una URL" no requieren recorrer el directorio. Dentro de `batch()` las
+escrituras se agrupan en una sola transacción.
+
+Uso desde la terminal:
+    python results_store.py latest https://en.wikipedia.org/wiki/Python_(programming_language)
+    python results_store.py recent 10
+    python results_store.py title Python
+    python results_store.py between 2026-10-01 2026-10-19T12:00
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    title TEXT,
+    created_at REAL NOT NULL,
+    screenshot TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_results_url_created ON results (url, created_at);
+CREATE INDEX IF NOT EXISTS ix_results_title ON results (title);
+CREATE INDEX IF NOT EXISTS ix_results_created ON results (created_at);
+"""
+
+
+class ResultsStore:
+    def __init__(self, path: str = "screenshots/results.sqlite3", batch_size: int = 50):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+        self._buffer = []
+        self._batch_depth = 0
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def batch(self):
+        """Agrupa las escrituras; se vuelcan al llenar el lote y al salir del último bloque abierto"""
+        # La profundidad es del almacén, no del hilo: los hilos del pipeline
+        # escriben dentro del mismo bloque
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                done = self._batch_depth == 0
+            if done:
+                self.flush()
+
+    def add(self, result: dict):
+        row = (
+            result["url"],
+            result.get("title"),
+            time.time(),
+            result.get("screenshot"),
+            json.dumps(result, ensure_ascii=False)
+        )
+
+        with self._lock:
+            self._buffer.append(row)
+            write_now = self._batch_depth == 0 or len(self._buffer) >= self.batch_size
+
+        if write_now:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO results (url, title, created_at, screenshot, data) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+
+    def _query(self, sql: str, params: tuple) -> List[dict]:
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {"id": row[0], "created_at": row[1], **json.loads(row[2])}
+            for row in rows
+        ]
+
+    def latest(self, url: str) -> Optional[dict]:
+        rows = self._query(
+            "SELECT id, created_at, data FROM results WHERE url = ? "
+            "ORDER BY created_at DESC, id DESC LIMIT 1",
+            (url,)
+        )
+        return rows[0] if rows else None
+
+    def by_title(self, title: str, limit: int = 50) -> List[dict]:
+        """Búsqueda por prefijo de título (usa el índice)"""
+        return self._query(
+            "SELECT id, created_at, data FROM results WHERE title >= ? AND title < ? "
+            "ORDER BY title, created_at DESC LIMIT ?",
+            (title, title + "\uffff", limit)
+        )
+
+    def between(self, start: float, end: float, limit: int = 1000) -> List[dict]:
+        """Resultados con start <= created_at < end (timestamps Unix)"""
+        return self._query(
+            "SELECT id, created_at, data FROM results WHERE created_at >= ? AND created_at < ? "
+            "ORDER BY created_at LIMIT ?",
+            (start, end, limit)
+        )
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        return self._query(
+            "SELECT id, created_at, data FROM results ORDER BY created_at DESC, id DESC LIMIT ?",
+            (limit,)
+        )
+
+
+def _timestamp(value: str) -> float:
+    """Timestamp Unix o fecha ISO 8601 (hora local)"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultar resultados del RPA")
+    parser.add_argument("--db", default="screenshots/results.sqlite3", help="Archivo SQLite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("latest", help="Último resultado de una URL").add_argument("url")
+    sub.add_parser("recent", help="Resultados más recientes").add_argument("limit", type=int, nargs="?", default=20)
+    sub.add_parser("title", help="Resultados por prefijo de título").add_argument("title")
+    between = sub.add_parser("between", help="Resultados creados en [inicio, fin)")
+    between.add_argument("start", type=_timestamp, help="Fecha ISO 8601 o timestamp Unix")
+    between.add_argument("end", type=_timestamp, help="Fecha ISO 8601 o timestamp Unix (excluida)")
+    between.add_argument("--limit", type=int, default=1000)
+
+    args = parser.parse_args()
+    store = ResultsStore(args.db)
+
+    if args.command == "latest":
+        rows = [r for r in [store.latest(args.url)] if r]
+    elif args.command == "recent":
+        rows = store.recent(args.limit)
+    elif args.command == "between":
+        rows = store.between(args.start, args.end, args.limit)
+    else:
+        rows = store.by_title(args.title)
+
+    print(json.dumps(rows, indent=2, ensure_ascii=False))
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
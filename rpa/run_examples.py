@@ -2,10 +2,10 @@
 Script para ejecutar múltiples ejemplos del RPA
 """
 from wikipedia_scraper import WikipediaScraper
-import time
+from async_pipeline import AsyncScrapePipeline
 
 
-def run_examples():
+def run_examples(concurrency: int = 3):
     """Ejecuta varios ejemplos de scraping"""
     
     examples = [
@@ -30,31 +30,28 @@ def run_examples():
     print("=" * 70)
     print()
     
-    for i, example in enumerate(examples, 1):
-        print(f"\n📌 Ejemplo {i}/{len(examples)}: {example['name']}")
-        print("-" * 70)
-        
-        try:
-            result = scraper.run(example['url'], headless=True)
+    # Los ejemplos se scrapean en paralelo; el límite por host reemplaza la espera fija
+    pipeline = AsyncScrapePipeline(scraper, concurrency=concurrency)
+    try:
+        outputs = pipeline.run([example['url'] for example in examples])
+    finally:
+        scraper.close()
+    
+    for example, output in zip(examples, outputs):
+        if output and "error" not in output:
+            print(f"✅ Completado: {example['name']}")
             results.append({
                 "name": example['name'],
                 "success": True,
-                "result": result
+                "result": output
             })
-            
-            print(f"✅ Completado: {example['name']}")
-            
-            # Esperar un poco entre requests
-            if i < len(examples):
-                print("\n⏳ Esperando 2 segundos...")
-                time.sleep(2)
-                
-        except Exception as e:
-            print(f"❌ Error en {example['name']}: {e}")
+        else:
+            error = output["error"] if output else "Sin resultado"
+            print(f"❌ Error en {example['name']}: {error}")
             results.append({
                 "name": example['name'],
                 "success": False,
-                "error": str(e)
+                "error": error
             })
     
     # Resumen final
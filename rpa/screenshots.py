@@ -0,0 +1,141 @@
+"""
+Screenshots fuera del camino crítico, con almacenamiento direccionado por contenido.
+
+La captura (page.screenshot) se hace en el hilo de la página porque Playwright
+no es thread-safe, pero devuelve bytes en memoria: el hash, la conversión a
+WebP y la escritura a disco corren en un pool de hilos.
+
+- Formatos: "jpeg" y "png" los codifica Chromium; "webp" se convierte desde
+  PNG con Pillow (opcional; sin Pillow se usa JPEG).
+- Calidad (jpeg/webp) y captura del viewport o de la página completa.
+- Cada archivo se guarda como `<dir>/<hash[:2]>/<hash>.<ext>`: dos capturas
+  idénticas producen el mismo archivo y se escriben una sola vez.
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+SCREENSHOT_FORMATS = ("jpeg", "png", "webp")
+
+
+class ScreenshotWriter:
+    def __init__(
+        self,
+        directory: str = "screenshots",
+        format: str = "jpeg",
+        quality: int = 80,
+        full_page: bool = False,
+        workers: int = 2
+    ):
+        if format not in SCREENSHOT_FORMATS:
+            raise ValueError(f"Formato de screenshot desconocido: {format}")
+        if format == "webp" and not PIL_AVAILABLE:
+            print("⚠️  Pillow no está instalado. Screenshots en JPEG en lugar de WebP.")
+            format = "jpeg"
+
+        self.directory = directory
+        self.format = format
+        self.quality = quality
+        self.full_page = full_page
+        self.extension = "jpg" if format == "jpeg" else format
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screenshots")
+        self._lock = threading.Lock()
+        self._pending = {}  # hash -> Future de la escritura en curso
+
+        self.captured = 0
+        self.deduplicated = 0
+        self.bytes_written = 0
+
+    def capture_options(self) -> dict:
+        """Argumentos para page.screenshot(); sin `path` Playwright devuelve los bytes"""
+        options = {"full_page": self.full_page, "scale": "css"}
+        if self.format == "jpeg":
+            options.update(type="jpeg", quality=self.quality)
+        else:
+            # WebP se convierte desde PNG sin pérdida en el pool
+            options["type"] = "png"
+        return options
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.{self.extension}")
+
+    def capture(self, page) -> str:
+        return self.submit(page.screenshot(**self.capture_options()))
+
+    async def capture_async(self, page) -> str:
+        return self.submit(await page.screenshot(**self.capture_options()))
+
+    def submit(self, data: bytes) -> str:
+        """
+        Encola la escritura de una captura y retorna su ruta final.
+        El hash se calcula sobre la captura original, así la ruta se conoce
+        antes de codificar.
+        """
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        path = self.path_for(digest)
+
+        with self._lock:
+            self.captured += 1
+            if digest in self._pending or os.path.exists(path):
+                self.deduplicated += 1
+                return path
+            self._pending[digest] = self._executor.submit(self._write, digest, path, data)
+
+        return path
+
+    def _encode(self, data: bytes) -> bytes:
+        if self.format != "webp":
+            return data
+        with Image.open(io.BytesIO(data)) as image:
+            output = io.BytesIO()
+            image.save(output, format="WEBP", quality=self.quality, method=4)
+            return output.getvalue()
+
+    def _write(self, digest: str, path: str, data: bytes):
+        try:
+            encoded = self._encode(data)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Escritura atómica: un lector nunca ve un archivo a medias
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(encoded)
+            os.replace(tmp_path, path)
+
+            with self._lock:
+                self.bytes_written += len(encoded)
+        except Exception as e:
+            print(f"⚠️  No se pudo guardar el screenshot {path}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+
+    def flush(self):
+        """Espera a que terminen las escrituras pendientes"""
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            future.result()
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "format": self.format,
+                "captured": self.captured,
+                "deduplicated": self.deduplicated,
+                "pending": len(self._pending),
+                "bytes_written": self.bytes_written
+            }
@@ -0,0 +1,77 @@
+"""
+Cliente del asistente de IA (POST /assistant/summarize).
+
+- Sesión keep-alive con pool de conexiones: no se abre un socket por página.
+- Reintentos con backoff ante errores de conexión y respuestas 429/503
+  (respetando Retry-After), que indican que el backend no procesó el texto.
+  No se reintenta un 502/504 ni un timeout de lectura: el POST no es
+  idempotente y el backend pudo haber generado y guardado el resumen.
+- `submit()` ejecuta en segundo plano y retorna un Future; como máximo
+  `max_in_flight` peticiones en curso y `max_pending` encoladas (si se llena,
+  `submit()` bloquea y frena al productor).
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 503)
+
+
+class SummarizerClient:
+    def __init__(
+        self,
+        api_url: str = "http://localhost:8000",
+        max_in_flight: int = 4,
+        max_pending: int = 16,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        connect_timeout: float = 5,
+        read_timeout: float = 60
+    ):
+        self.url = f"{api_url}/assistant/summarize"
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["POST"]),
+            backoff_factor=backoff_factor,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="summarizer")
+        self._slots = threading.BoundedSemaphore(max_in_flight + max_pending)
+
+    def summarize(self, text: str) -> dict:
+        response = self.session.post(self.url, json={"text": text}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def submit(self, fn, *args) -> Future:
+        """
+        Ejecuta `fn(*args)` en el pool del cliente (p. ej. una función que
+        llama a summarize). Bloquea si ya hay demasiadas peticiones pendientes.
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
@@ -0,0 +1,76 @@
+"""
+Fixtures de las pruebas del RPA.
+
+`wiki_server` sirve páginas HTML desde memoria en un http.server local, así
+las pruebas no dependen de Wikipedia ni de la red.
+"""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+RPA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+sys.path.insert(0, RPA_DIR)
+
+
+def wiki_page(title: str, body: str) -> str:
+    """Página con la estructura que usan los extractores (.mw-content-container > .mw-parser-output)"""
+    return (
+        f"<html><head><meta charset='utf-8'><title>{title}</title></head><body>"
+        f"<div class='mw-content-container'><div class='mw-parser-output'>{body}</div></div>"
+        f"</body></html>"
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = self.server.pages.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def wiki_server():
+    """Servidor local; agregar páginas con server.pages[path] = html y usar server.url"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.pages = {}
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """El scraper escribe screenshots/ y su base de resultados en el directorio actual"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def chromium():
+    """Salta la prueba si Playwright no puede lanzar Chromium (p. ej. sin `playwright install`)"""
+    sync_api = pytest.importorskip("playwright.sync_api")
+    try:
+        with sync_api.sync_playwright() as playwright:
+            playwright.chromium.launch().close()
+    except Exception as e:
+        pytest.skip(f"Chromium no disponible: {str(e).splitlines()[0]}")
@@ -0,0 +1,57 @@
+from conftest import wiki_page
+from browser_pool import BrowserPool
+
+PAGES = 6
+
+
+def _serve_pages(server):
+    for n in range(PAGES):
+        server.pages[f"/wiki/Pagina_{n}"] = wiki_page(f"Pagina {n}", f"<p>Contenido de la página {n}.</p>")
+    return [f"{server.url}/wiki/Pagina_{n}" for n in range(PAGES)]
+
+
+def test_one_browser_and_context_reused_across_pages(wiki_server, chromium):
+    urls = _serve_pages(wiki_server)
+
+    with BrowserPool() as pool:
+        contexts = set()
+        for n, url in enumerate(urls):
+            with pool.page() as page:
+                page.goto(url, wait_until="domcontentloaded")
+                assert page.title() == f"Pagina {n}"
+                contexts.add(id(page.context))
+
+        assert pool.browser_launches == 1
+        assert pool.context_recycles == 0
+        assert pool.pages_served == PAGES
+        assert len(contexts) == 1
+        # Se reutilizó la misma página en lugar de abrir una por URL
+        assert len(pool._context.pages) == 1
+
+
+def test_context_recycled_every_n_pages(wiki_server, chromium):
+    urls = _serve_pages(wiki_server)
+
+    with BrowserPool(max_pages_per_context=2) as pool:
+        for url in urls:
+            with pool.page() as page:
+                page.goto(url, wait_until="domcontentloaded")
+
+        assert pool.browser_launches == 1
+        assert pool.context_recycles == PAGES // 2 - 1
+
+
+def test_browser_relaunched_after_disconnect(wiki_server, chromium):
+    urls = _serve_pages(wiki_server)
+
+    with BrowserPool() as pool:
+        with pool.page() as page:
+            page.goto(urls[0], wait_until="domcontentloaded")
+
+        pool._browser.close()
+
+        with pool.page() as page:
+            page.goto(urls[1], wait_until="domcontentloaded")
+            assert page.title() == "Pagina 1"
+
+        assert pool.browser_launches == 2
@@ -0,0 +1,68 @@
+from conftest import wiki_page
+from crawler import WikiCrawler
+from wikipedia_scraper import WikipediaScraper
+
+PARAGRAPH = "Texto de prueba suficientemente largo para contar como primer párrafo del artículo."
+
+
+def _article(title: str, links: list) -> str:
+    anchors = "".join(f"<a href='{href}'>{href}</a> " for href in links)
+    return wiki_page(title, f"<p>{title}: {PARAGRAPH}</p><p>{anchors}</p>")
+
+
+def _mini_wiki(server):
+    server.pages.update({
+        "/wiki/Inicio": _article("Inicio", [
+            "/wiki/Avengers:_Doomsday",
+            "/wiki/Python#Historia",
+            "/wiki/Special:Random",
+            "/wiki/File:Logo.png",
+            "/wiki/Category:Pruebas",
+            "/wiki/Talk:Inicio",
+            "/wiki/User_talk:Alguien",
+            "/wiki/Wikipedia:Acerca_de",
+            "/wiki/Template:Ficha",
+            "/wiki/Portal:Ciencia",
+            "https://otro.example/wiki/Externo",
+        ]),
+        "/wiki/Avengers:_Doomsday": _article("Avengers: Doomsday", ["/wiki/Profundo"]),
+        "/wiki/Python": _article("Python", ["/wiki/Inicio", "/wiki/Avengers:_Doomsday"]),
+        "/wiki/Profundo": _article("Profundo", ["/wiki/Mas_profundo"]),
+        "/wiki/Mas_profundo": _article("Más profundo", []),
+    })
+
+
+def _crawl(server, **options):
+    scraper = WikipediaScraper(engine="http", screenshot_mode="never")
+    crawler = WikiCrawler(scraper, host_interval=0, **options)
+    try:
+        stats = crawler.crawl([server.url + "/wiki/Inicio"])
+    finally:
+        scraper.close()
+    return stats, sorted(server.requests)
+
+
+def test_follows_titles_with_colon_and_skips_namespaces(wiki_server, workdir):
+    _mini_wiki(wiki_server)
+
+    stats, requested = _crawl(wiki_server, max_depth=1)
+
+    assert requested == ["/wiki/Avengers:_Doomsday", "/wiki/Inicio", "/wiki/Python"]
+    assert stats["pages"] == 3
+    assert stats["errors"] == 0
+
+
+def test_max_depth_limits_the_crawl(wiki_server, workdir):
+    _mini_wiki(wiki_server)
+
+    _, requested = _crawl(wiki_server, max_depth=2)
+    assert "/wiki/Profundo" in requested
+    assert "/wiki/Mas_profundo" not in requested
+
+
+def test_max_pages_limits_the_crawl(wiki_server, workdir):
+    _mini_wiki(wiki_server)
+
+    stats, requested = _crawl(wiki_server, max_depth=5, max_pages=2)
+    assert stats["pages"] == 2
+    assert len(requested) == 2
@@ -0,0 +1,54 @@
+import os
+from conftest import FIXTURES_DIR
+from http_extractor import HttpExtractor
+from wikipedia_scraper import FIRST_PARAGRAPH_JS, FULL_CONTENT_JS
+
+FIRST_PARAGRAPH = (
+    "The Río de Ejemplo is a river of about 120\u00a0km that flows through the fictional province of "
+    "Provincia.[1] Its source lies at 1,200\u00a0m above sea level."
+)
+PARAGRAPHS = [
+    FIRST_PARAGRAPH,
+    "Historically the river marked a boundary between two kingdoms;\nthe old bridge still stands.\n\n"
+    "Several mills operated along its banks until the 1950s.",
+    "The river basin covers roughly 900 square kilometres and hosts several protected species, "
+    "including otters and kingfishers.",
+]
+
+
+def _article() -> bytes:
+    with open(os.path.join(FIXTURES_DIR, "article.html"), "rb") as f:
+        return f.read()
+
+
+def test_first_paragraph_matches_inner_text():
+    result = HttpExtractor().extract_first_paragraph(_article())
+
+    assert result["title"] == "Río de Ejemplo - Wikipedia"
+    # Sin coordenadas, sin nodos ocultos y con &nbsp; conservado
+    assert result["first_paragraph"] == FIRST_PARAGRAPH
+
+
+def test_full_content_matches_inner_text():
+    result = HttpExtractor().extract_full_content(_article())
+
+    assert result["paragraphs"] == PARAGRAPHS
+    assert result["full_text"] == "\n\n".join(PARAGRAPHS)
+
+
+def test_http_engine_matches_browser(wiki_server, chromium):
+    from playwright.sync_api import sync_playwright
+
+    html = _article()
+    wiki_server.pages["/wiki/Rio_de_Ejemplo"] = html.decode("utf-8")
+    extractor = HttpExtractor()
+
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        try:
+            page = browser.new_page()
+            page.goto(f"{wiki_server.url}/wiki/Rio_de_Ejemplo", wait_until="domcontentloaded")
+            assert page.evaluate(FIRST_PARAGRAPH_JS) == extractor.extract_first_paragraph(html)["first_paragraph"]
+            assert page.evaluate(FULL_CONTENT_JS) == extractor.extract_full_content(html)
+        finally:
+            browser.close()
@@ -0,0 +1,150 @@
+"""
+Medición de tiempos por etapa del RPA.
+
+Cada página registra spans por etapa (lanzamiento del navegador, goto,
+wait_for_selector, evaluate, screenshot, POST al asistente, etc.). Al final
+de la ejecución el reporte agrega p50/p95/p99 por etapa y se guarda en JSON.
+
+Opcionalmente `profiled()` envuelve la ejecución con cProfile o pyinstrument.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Percentil por rango más cercano"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class PageTimings:
+    def __init__(self, url: str):
+        self.url = url
+        self.spans = {}
+        self._started = time.perf_counter()
+        self.total = None
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def add(self, stage: str, seconds: float):
+        self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    def finish(self):
+        self.total = time.perf_counter() - self._started
+
+    def as_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "total_ms": round((self.total or 0) * 1000, 2),
+            "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in self.spans.items()}
+        }
+
+
+class TimingRecorder:
+    def __init__(self):
+        self.pages = []
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def page(self, url: str) -> PageTimings:
+        return PageTimings(url)
+
+    def finish(self, page_timings: PageTimings):
+        page_timings.finish()
+        with self._lock:
+            self.pages.append(page_timings)
+
+    def summary(self) -> dict:
+        """Estadísticas en ms por etapa a lo largo de la ejecución"""
+        with self._lock:
+            pages = list(self.pages)
+
+        by_stage = {}
+        for page in pages:
+            for stage, seconds in page.spans.items():
+                by_stage.setdefault(stage, []).append(seconds * 1000)
+            by_stage.setdefault("total", []).append((page.total or 0) * 1000)
+
+        summary = {}
+        for stage, values in by_stage.items():
+            values.sort()
+            summary[stage] = {
+                "count": len(values),
+                "sum": round(sum(values), 2),
+                "mean": round(sum(values) / len(values), 2),
+                "p50": round(percentile(values, 50), 2),
+                "p95": round(percentile(values, 95), 2),
+                "p99": round(percentile(values, 99), 2),
+                "max": round(values[-1], 2)
+            }
+        return summary
+
+    def write_report(self, path: str) -> dict:
+        report = {
+            "started_at": self._started,
+            "finished_at": time.time(),
+            "pages": len(self.pages),
+            "stages": self.summary(),
+            "per_page": [page.as_dict() for page in self.pages]
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+
+        print(f"{'Etapa':<20}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'total ms':>12}")
+        for stage, stats in sorted(summary.items(), key=lambda item: -item[1]["sum"]):
+            print(f"{stage:<20}{stats['count']:>6}{stats['p50']:>10.1f}{stats['p95']:>10.1f}"
+                  f"{stats['p99']:>10.1f}{stats['sum']:>12.1f}")
+
+
+@contextmanager
+def profiled(kind: str = None, path: str = None):
+    """
+    Perfila el bloque con "cprofile" (pstats en `path`) o "pyinstrument" (HTML en `path`).
+    Sin `kind` no hace nada.
+    """
+    if not kind:
+        yield
+        return
+
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("⚠️  pyinstrument no está instalado. Usando cProfile.")
+            kind = "cprofile"
+
+    if kind == "pyinstrument":
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path or "profile.html", "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path or "profile.pstats")
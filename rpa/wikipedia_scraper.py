@@ -1,64 +1,309 @@
 import os
 import sys
+import threading
 import requests
-from playwright.sync_api import sync_playwright
+from collections import deque
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
-import json
+import time
+from browser_pool import BrowserPool, LOAD_PROFILES
+from http_cache import HttpCache, content_hash
+from http_extractor import HttpExtractor, NeedsRendering
+from results_store import ResultsStore
+from screenshots import ScreenshotWriter
+from summarizer_client import SummarizerClient
+from timing import TimingRecorder
+
+# Reglas de extracción compartidas por los modos síncrono y asíncrono
+FIRST_PARAGRAPH_JS = """
+    () => {
+        const content = document.querySelector('.mw-content-container');
+        if (!content) return null;
+
+        const paragraphs = content.querySelectorAll('p');
+
+        for (let p of paragraphs) {
+            const text = p.innerText.trim();
+            if (text.length > 50 && !text.startsWith('Coordinates:')) {
+                return text;
+            }
+        }
+        return null;
+    }
+"""
+
+FULL_CONTENT_JS = """
+    () => {
+        const content = document.querySelector('.mw-content-container');
+        if (!content) return null;
+
+        // Extraer todos los párrafos
+        const paragraphs = Array.from(content.querySelectorAll('p'))
+            .map(p => p.innerText.trim())
+            .filter(text => text.length > 50);
+
+        return {
+            title: document.title,
+            paragraphs: paragraphs,
+            full_text: paragraphs.join('\\n\\n')
+        };
+    }
+"""
+
+
+SCREENSHOT_MODES = ("always", "on_error", "never")
+ENGINES = ("browser", "http")
 
 
 class WikipediaScraper:
-    def __init__(self, api_url: str = "http://localhost:8000"):
+    def __init__(
+        self,
+        api_url: str = "http://localhost:8000",
+        profile: str = "full",
+        screenshot_mode: str = "always",
+        engine: str = "browser",
+        cache_dir: str = None,
+        screenshot_options: dict = None
+    ):
+        """
+        - profile: "full" descarga todo; "fast" bloquea imágenes, fuentes y trackers
+        - screenshot_mode: "always", "on_error" (solo si falla la extracción) o "never"
+        - engine: "browser" (Playwright) o "http" (sin navegador, con Playwright como respaldo)
+        - cache_dir: activa el caché HTTP condicional y el memo de extracciones/resúmenes
+        - screenshot_options: format ("jpeg", "png", "webp"), quality, full_page, workers
+        """
+        if profile not in LOAD_PROFILES:
+            raise ValueError(f"Perfil desconocido: {profile}")
+        if screenshot_mode not in SCREENSHOT_MODES:
+            raise ValueError(f"Modo de screenshot desconocido: {screenshot_mode}")
+        if engine not in ENGINES:
+            raise ValueError(f"Motor desconocido: {engine}")
+
         self.api_url = api_url
+        self.summarizer = SummarizerClient(api_url)
+        self.profile = profile
+        self.screenshot_mode = screenshot_mode
+        self.engine = engine
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self.http = HttpExtractor(cache=self.cache) if engine == "http" else None
         self.screenshots_dir = "screenshots"
+        self.pool = None  # BrowserPool activo (ver browser_session)
 
         if not os.path.exists(self.screenshots_dir):
             os.makedirs(self.screenshots_dir)
 
+        self.results = ResultsStore(os.path.join(self.screenshots_dir, "results.sqlite3"))
+        self.screenshots = ScreenshotWriter(self.screenshots_dir, **(screenshot_options or {}))
+
+        # Tiempos por etapa de cada página procesada con run()
+        self.timings = TimingRecorder()
+        self._local = threading.local()
+
+    @property
+    def _page_timings(self):
+        # Por hilo: los resúmenes en segundo plano miden su propia página
+        return getattr(self._local, "page_timings", None)
+
+    @_page_timings.setter
+    def _page_timings(self, page_timings):
+        self._local.page_timings = page_timings
+
+    @contextmanager
+    def page_timing(self, url: str):
+        """Registra los spans de las etapas ejecutadas dentro del bloque para una página"""
+        self._page_timings = self.timings.page(url)
+        try:
+            yield self._page_timings
+        finally:
+            self.timings.finish(self._page_timings)
+            self._page_timings = None
+
+    def span(self, stage: str):
+        """Span de una etapa de la página actual (no-op fuera de page_timing)"""
+        if self._page_timings is None:
+            return nullcontext()
+        return self._page_timings.span(stage)
+
+    @contextmanager
+    def browser_session(self, headless: bool = True, **pool_options):
+        """
+        Mantiene un navegador abierto para todas las páginas scrapeadas dentro del bloque.
+
+        Uso:
+            with scraper.browser_session():
+                for url in urls:
+                    scraper.run(url)
+
+        Al cerrar la sesión más externa se esperan sus screenshots.
+        """
+        outermost = self.pool is None
+        try:
+            with self._browser_pool(headless, **pool_options) as pool:
+                yield pool
+        finally:
+            if outermost:
+                self.screenshots.flush()
+
+    @contextmanager
+    def _browser_pool(self, headless: bool, **pool_options):
+        """Pool activo, o uno nuevo mientras dure el bloque"""
+        if self.pool is not None:
+            yield self.pool
+            return
+
+        pool_options.setdefault("blocked_resource_types", LOAD_PROFILES[self.profile])
+
+        with BrowserPool(headless=headless, **pool_options) as pool:
+            self.pool = pool
+            try:
+                yield pool
+            finally:
+                self.pool = None
+
+    def close(self):
+        """Espera los screenshots y resúmenes pendientes y libera hilos, sesiones HTTP y bases SQLite"""
+        self.screenshots.close()
+        self.summarizer.close()
+        if self.http is not None:
+            self.http.close()
+        if self.cache is not None:
+            self.cache.close()
+        self.results.close()
+
+    @contextmanager
+    def _page(self, headless: bool):
+        """
+        Página del pool activo, o de un navegador temporal si no hay sesión.
+        El screenshot de una página suelta no se espera aquí: se escribe en
+        segundo plano y close() espera los pendientes.
+        """
+        with self._browser_pool(headless) as pool:
+            launches = pool.browser_launches
+            started = time.perf_counter()
+            page = pool.acquire()
+
+            if self._page_timings is not None:
+                stage = "browser_launch" if pool.browser_launches != launches else "acquire_page"
+                self._page_timings.add(stage, time.perf_counter() - started)
+
+            healthy = True
+            try:
+                yield page
+            except Exception:
+                healthy = False
+                raise
+            finally:
+                pool.release(page, healthy)
+
+    @contextmanager
+    def _measure(self, page):
+        """
+        Mide tiempo y transferencia de una página. Los bytes son el cuerpo
+        recibido por cada petición terminada, tal como viajó (Request.sizes()):
+        cuentan también las respuestas chunked o comprimidas sin Content-Length.
+        """
+        metrics = {"profile": self.profile, "requests": 0, "bytes": 0}
+        blocked_before = self.pool.blocked_requests
+
+        def on_response(response):
+            metrics["requests"] += 1
+
+        def on_finished(request):
+            try:
+                metrics["bytes"] += max(0, request.sizes()["responseBodySize"])
+            except Exception:
+                pass  # La página se cerró antes de leer los tamaños
+
+        page.on("response", on_response)
+        page.on("requestfinished", on_finished)
+        started = time.perf_counter()
+
+        try:
+            yield metrics
+        finally:
+            page.remove_listener("response", on_response)
+            page.remove_listener("requestfinished", on_finished)
+            metrics["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            metrics["blocked"] = self.pool.blocked_requests - blocked_before
+
+    def _take_screenshot(self, page) -> str:
+        # Solo la captura ocurre aquí; la codificación y escritura van al pool
+        screenshot_path = self.screenshots.capture(page)
+        print(f"✓ Screenshot encolado: {screenshot_path}")
+        return screenshot_path
+
     def scrape_wikipedia(self, url: str, headless: bool = True) -> dict:
         print(f"🤖 Iniciando RPA para: {url}")
         print(f"   Modo: {'Headless' if headless else 'Con interfaz'}")
         print()
-        with sync_playwright() as p:
-            # Lanzamos navegador
-            browser = p.chromium.launch(headless=headless)
-            page = browser.new_page()
+
+        if self.http is not None:
+            try:
+                return self._scrape_http(url)
+            except NeedsRendering as e:
+                print(f"↪️  {e}: usando el navegador")
+
+        return self._scrape_browser(url, headless)
+
+    def _scrape_http(self, url: str) -> dict:
+        """Extracción sin navegador (sin screenshot)"""
+        started = time.perf_counter()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        print(f"📡 Descargando {url}...")
+        with self.span("http_fetch"):
+            fetched = self.http.fetch(url)
+        if fetched.from_cache:
+            print("✓ Sin cambios (304): usando copia en caché")
+        with self.span("http_parse"):
+            extracted = self.http.first_paragraph(fetched)
+
+        print(f"✓ Título: {extracted['title']}")
+        print(f"✓ Primer párrafo extraído ({len(extracted['first_paragraph'])} caracteres)")
+        print()
+
+        return {
+            "url": url,
+            "title": extracted["title"],
+            "first_paragraph": extracted["first_paragraph"],
+            "timestamp": timestamp,
+            "screenshot": None,
+            "metrics": {
+                "profile": "http",
+                "requests": 1,
+                "bytes": 0 if fetched.from_cache else len(fetched.content),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                "blocked": 0
+            }
+        }
+
+    def _scrape_browser(self, url: str, headless: bool = True) -> dict:
+        with self._page(headless) as page, self._measure(page) as metrics:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            screenshot_path = None
 
             try:
                 # Navegamos a la página
                 print(f"📡 Navegando a {url}...")
-                page.goto(url, wait_until="domcontentloaded")
+                with self.span("goto"):
+                    page.goto(url, wait_until="domcontentloaded")
 
                 # Esperamos a que cargue el contenido
-                page.wait_for_selector(".mw-parser-output", timeout=100000)
+                with self.span("wait_for_selector"):
+                    page.wait_for_selector(".mw-parser-output", timeout=100000)
                 print("✓ Página cargada")
 
                 # Tomar screenshot
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                screenshot_path = f"{self.screenshots_dir}/wikipedia_{timestamp}.png"
-                page.screenshot(path=screenshot_path)
-                print(f"✓ Screenshot guardado: {screenshot_path}")
+                if self.screenshot_mode == "always":
+                    with self.span("screenshot"):
+                        screenshot_path = self._take_screenshot(page)
 
                 # Extraer título
-                title = page.title()
+                with self.span("evaluate"):
+                    title = page.title()
+                    first_paragraph = page.evaluate(FIRST_PARAGRAPH_JS)
                 print(f"✓ Título: {title}")
 
-                first_paragraph = page.evaluate("""
-                    () => {
-                        const content = document.querySelector('.mw-content-container');
-                        if (!content) return null;
-
-                        const paragraphs = content.querySelectorAll('p');
-
-                        for (let p of paragraphs) {
-                            const text = p.innerText.trim();
-                            if (text.length > 50 && !text.startsWith('Coordinates:')) {
-                                return text;
-                            }
-                        }
-                        return null;
-                    }
-                """)
-
                 if not first_paragraph:
                     raise Exception("No se pudo extraer el primer párrafo")
 
@@ -70,30 +315,39 @@ class WikipediaScraper:
                     "title": title,
                     "first_paragraph": first_paragraph,
                     "timestamp": timestamp,
-                    "screenshot": screenshot_path
+                    "screenshot": screenshot_path,
+                    "metrics": metrics
                 }
                 
                 return result
                 
             except Exception as e:
                 print(f"❌ Error durante el scraping: {e}")
+                if self.screenshot_mode == "on_error" and not page.is_closed():
+                    try:
+                        self._take_screenshot(page)
+                    except Exception:
+                        pass
                 raise
-            
-            finally:
-                browser.close()
     
     def send_to_summarizer(self, text: str) -> dict:
+        # Un texto ya resumido no se vuelve a enviar
+        text_hash = content_hash(text) if self.cache else None
+        if text_hash:
+            cached = self.cache.memo_get("summary", text_hash)
+            if cached is not None:
+                print("✓ Resumen reutilizado desde caché")
+                print()
+                return cached
+        
         print("📤 Enviando texto al asistente de IA...")
         
         try:
-            response = requests.post(
-                f"{self.api_url}/assistant/summarize",
-                json={"text": text},
-                timeout=30
-            )
+            with self.span("summarize"):
+                data = self.summarizer.summarize(text)
             
-            response.raise_for_status()
-            data = response.json()
+            if text_hash:
+                self.cache.memo_put("summary", text_hash, data)
             
             print("✓ Resumen generado exitosamente")
             print()
@@ -110,38 +364,110 @@ class WikipediaScraper:
         print("=" * 70)
         print()
         
-        # Paso 1: Scrapear Wikipedia
-        scrape_result = self.scrape_wikipedia(url, headless)
+        with self.page_timing(url) as page_timings:
+            # Paso 1: Scrapear Wikipedia
+            scrape_result = self.scrape_wikipedia(url, headless)
+            
+            # Paso 2: Enviar al asistente
+            summary_result = self.send_to_summarizer(scrape_result["first_paragraph"])
+            
+            # Paso 3: Guardar resultado en el almacén indexado
+            final_result = self._store(scrape_result, summary_result, page_timings)
+        
+        self._print_result(final_result)
+        return final_result
+    
+    def run_pipelined(self, urls: list, headless: bool = True) -> list:
+        """
+        Procesa varias URLs solapando scraping y resúmenes: mientras el asistente
+        resume una página, el navegador ya está en la siguiente. Los resultados
+        se guardan y retornan en el orden de `urls`.
+        """
+        results = []
+        pending = deque()  # (scrape_result, Future del resumen, PageTimings)
+        
+        def finish(scrape_result, future, page_timings):
+            try:
+                summary_result = future.result()
+                final_result = self._store(scrape_result, summary_result, page_timings)
+                self._print_result(final_result)
+                results.append(final_result)
+            except Exception as e:
+                print(f"✗ Error resumiendo {scrape_result['url']}: {e}")
+                results.append({"url": scrape_result["url"], "error": str(e)})
+            finally:
+                self.timings.finish(page_timings)
         
-        # Paso 2: Enviar al asistente
-        summary_result = self.send_to_summarizer(scrape_result["first_paragraph"])
+        with self.browser_session(headless), self.results.batch():
+            for i, url in enumerate(urls, 1):
+                print(f"\n📄 Procesando {i}/{len(urls)}: {url}")
+                
+                page_timings = self.timings.page(url)
+                self._page_timings = page_timings
+                try:
+                    scrape_result = self.scrape_wikipedia(url, headless)
+                    future = self.summarizer.submit(
+                        self._timed_summary, scrape_result["first_paragraph"], page_timings
+                    )
+                    pending.append((scrape_result, future, page_timings))
+                except Exception as e:
+                    print(f"✗ Error: {e}")
+                    self.timings.finish(page_timings)
+                    # Respeta el orden: primero lo que ya estaba en vuelo
+                    while pending:
+                        finish(*pending.popleft())
+                    results.append({"url": url, "error": str(e)})
+                    continue
+                finally:
+                    self._page_timings = None
+                
+                # Resultados ya listos, sin esperar a los que siguen en vuelo
+                while pending and pending[0][1].done():
+                    finish(*pending.popleft())
+            
+            while pending:
+                finish(*pending.popleft())
         
-        # Combinar resultados
+        return results
+    
+    def _timed_summary(self, text: str, page_timings) -> dict:
+        """Resumen en un hilo del cliente; el span se suma a su página"""
+        self._page_timings = page_timings
+        try:
+            return self.send_to_summarizer(text)
+        finally:
+            self._page_timings = None
+    
+    def _store(self, scrape_result: dict, summary_result: dict, page_timings) -> dict:
         final_result = {
             **scrape_result,
-            "summary": summary_result
+            "summary": summary_result,
+            "timings": page_timings.as_dict()["stages_ms"]
         }
-        
-        # Guardar resultado en JSON
-        output_file = f"{self.screenshots_dir}/result_{scrape_result['timestamp']}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(final_result, f, indent=2, ensure_ascii=False)
-        
+        started = time.perf_counter()
+        self.results.add(final_result)
+        page_timings.add("store", time.perf_counter() - started)
+        return final_result
+    
+    def _print_result(self, final_result: dict):
+        summary_result = final_result["summary"]
         print("=" * 70)
         print("✅ PROCESO COMPLETADO")
         print("=" * 70)
         print()
-        print(f"📄 Título: {scrape_result['title']}")
-        print(f"📝 Texto original: {len(scrape_result['first_paragraph'])} caracteres")
+        print(f"📄 Título: {final_result['title']}")
+        print(f"📝 Texto original: {len(final_result['first_paragraph'])} caracteres")
         print(f"✨ Resumen: {len(summary_result['summary'])} caracteres")
         print(f"🤖 Modelo: {summary_result['model_used']}")
         print(f"🎯 Tokens: {summary_result['tokens_used']}")
-        print(f"📸 Screenshot: {scrape_result['screenshot']}")
-        print(f"💾 Resultado: {output_file}")
+        print(f"📸 Screenshot: {final_result['screenshot'] or '-'}")
+        metrics = final_result["metrics"]
+        print(f"⚡ Perfil {metrics['profile']}: {metrics['elapsed_ms']} ms, "
+              f"{metrics['bytes'] / 1024:.0f} KB en {metrics['requests']} respuestas, "
+              f"{metrics['blocked']} bloqueadas")
+        print(f"💾 Resultado: {self.results.path}")
+        print("⏱️  " + " | ".join(f"{stage} {ms:.0f} ms" for stage, ms in final_result["timings"].items()))
         print()
-        
-        return final_result
-
 
 def main():
     """Función principal"""
@@ -151,13 +477,17 @@ def main():
     # Obtener URL de argumentos o usar default
     url = sys.argv[1] if len(sys.argv) > 1 else default_url
     
-    # Modo headless (puede cambiarse a False para ver el navegador)
-    headless = True
-    if len(sys.argv) > 2 and sys.argv[2] == "--show":
-        headless = False
+    # Opciones: --show (con interfaz), --fast (perfil ligero), --no-screenshot, --http, --cache
+    flags = sys.argv[2:]
+    headless = "--show" not in flags
     
     # Crear scraper
-    scraper = WikipediaScraper()
+    scraper = WikipediaScraper(
+        profile="fast" if "--fast" in flags else "full",
+        screenshot_mode="never" if "--no-screenshot" in flags else "always",
+        engine="http" if "--http" in flags else "browser",
+        cache_dir=".cache" if "--cache" in flags else None
+    )
     
     try:
         # Ejecutar RPA
@@ -175,6 +505,9 @@ def main():
     except Exception as e:
         print(f"\n❌ Error fatal: {e}")
         return 1
+    
+    finally:
+        scraper.close()
 
 
 if __name__ == "__main__":